@@ -0,0 +1,147 @@
+# Copyright (C) 2015-2016: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+import h5py
+
+from gprMax.exceptions import CmdInputError
+
+
+def solver_state(G):
+    """Gathers the arrays that hold the state of the solver, i.e. everything that changes during the main loop.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        state (dict): Arrays keyed by the path they are stored under in a checkpoint file.
+    """
+
+    state = {}
+    for field in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'):
+        state['/fields/' + field] = getattr(G, field)
+
+    # Temporary arrays for dispersive materials
+    if hasattr(G, 'Tx'):
+        for T in ('Tx', 'Ty', 'Tz'):
+            state['/dispersive/' + T] = getattr(G, T)
+
+    for pml in G.pmls:
+        for attr in sorted(vars(pml)):
+            if attr.startswith('EPhi') or attr.startswith('HPhi'):
+                state['/pmls/' + pml.direction + '/' + attr] = getattr(pml, attr)
+
+    for tlindex, tl in enumerate(G.transmissionlines):
+        state['/tls/tl' + str(tlindex + 1) + '/voltage'] = tl.voltage
+        state['/tls/tl' + str(tlindex + 1) + '/current'] = tl.current
+
+    return state
+
+
+def initial_solver_state(G):
+    """Copies the parts of the state of the solver that are not zero at the start of a model run, i.e. the state of any transmission lines once their incident voltage and current have been calculated.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        initialstate (dict): Copies of arrays, and coefficients for the ABCs of transmission lines, keyed by the path they are stored under in a checkpoint file.
+    """
+
+    initialstate = {}
+    for path, array in solver_state(G).items():
+        if array.any():
+            initialstate[path] = array.copy()
+    for tlindex, tl in enumerate(G.transmissionlines):
+        initialstate['/tls/tl' + str(tlindex + 1) + '/abcv'] = (tl.abcv0, tl.abcv1)
+
+    return initialstate
+
+
+def reset_solver_state(G, initialstate):
+    """Resets the state of the solver to that at the start of a model run, so a model that has already been built can be run again.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+        initialstate (dict): Parts of the state of the solver that are not zero at the start of a model run, from initial_solver_state.
+    """
+
+    for path, array in solver_state(G).items():
+        if path in initialstate:
+            array[:] = initialstate[path]
+        else:
+            array.fill(0)
+    for tlindex, tl in enumerate(G.transmissionlines):
+        tl.abcv0, tl.abcv1 = initialstate['/tls/tl' + str(tlindex + 1) + '/abcv']
+
+
+def write_checkpoint(checkpointfile, iteration, abstime, G):
+    """Writes the state of the solver to a checkpoint file in HDF5 format. The file is written to a temporary file first so an interrupted write does not destroy an existing checkpoint.
+
+    Args:
+        checkpointfile (str): Name of the checkpoint file.
+        iteration (int): Iteration number to resume the main loop from.
+        abstime (float): Absolute time at the start of iteration.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    tmpfile = checkpointfile + '.tmp'
+    with h5py.File(tmpfile, 'w') as f:
+        f.attrs['Title'] = G.title
+        f.attrs['Iterations'] = G.iterations
+        f.attrs['nx, ny, nz'] = (G.nx, G.ny, G.nz)
+        f.attrs['Iteration'] = iteration
+        f.attrs['abstime'] = abstime
+        for path, array in solver_state(G).items():
+            f[path] = array
+        for tlindex, tl in enumerate(G.transmissionlines):
+            f['/tls/tl' + str(tlindex + 1)].attrs['abcv0'] = tl.abcv0
+            f['/tls/tl' + str(tlindex + 1)].attrs['abcv1'] = tl.abcv1
+
+    os.replace(tmpfile, checkpointfile)
+
+
+def read_checkpoint(checkpointfile, G):
+    """Restores the state of the solver from a checkpoint file in HDF5 format.
+
+    Args:
+        checkpointfile (str): Name of the checkpoint file.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        iteration (int): Iteration number to resume the main loop from.
+        abstime (float): Absolute time at the start of iteration.
+    """
+
+    with h5py.File(checkpointfile, 'r') as f:
+        if f.attrs['Iterations'] != G.iterations or tuple(f.attrs['nx, ny, nz']) != (G.nx, G.ny, G.nz):
+            raise CmdInputError('Checkpoint file {} does not match the model being run'.format(checkpointfile))
+
+        for path, array in solver_state(G).items():
+            if path not in f or f[path].shape != array.shape:
+                raise CmdInputError('Checkpoint file {} does not match the model being run ({})'.format(checkpointfile, path))
+            f[path].read_direct(array)
+        for tlindex, tl in enumerate(G.transmissionlines):
+            tl.abcv0 = f['/tls/tl' + str(tlindex + 1)].attrs['abcv0']
+            tl.abcv1 = f['/tls/tl' + str(tlindex + 1)].attrs['abcv1']
+
+        iteration = int(f.attrs['Iteration'])
+        abstime = float(f.attrs['abstime'])
+
+    return iteration, abstime
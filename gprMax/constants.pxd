@@ -20,10 +20,21 @@ import numpy as np
 cimport numpy as np
 
 # Data types:
-#   Solid and ID arrays use 32-bit integers (0 to 4294967295)
-#   Rigid arrays use 8-bit integers (the smallest available type to store true/false)
-#   Fractal and dispersive coefficient arrays use complex numbers (complextype) which are represented as two floats
+#   Solid array uses 32-bit integers (0 to 4294967295)
+#   ID array uses the narrowest unsigned integer (indextype) that can index all the materials in the model, i.e. 8, 16, or 32-bit
+#   Rigid arrays are bit-packed, using 16-bit (electric, 12 edges) and 8-bit (magnetic, 6 edges) integers
+#   Fractal and dispersive coefficient arrays use complex numbers (complextype) which are represented as two floats,
+#   except dispersive coefficient arrays use floats (floattype) if all the dispersive materials are Debye (dispersivetype)
 #   Main field arrays use floats (floattype) and complex numbers (complextype)
 
 ctypedef np.float32_t floattype_t
-ctypedef np.complex64_t complextype_t
\ No newline at end of file
+ctypedef np.complex64_t complextype_t
+
+ctypedef fused indextype_t:
+    np.uint8_t
+    np.uint16_t
+    np.uint32_t
+
+ctypedef fused dispersivetype_t:
+    floattype_t
+    complextype_t
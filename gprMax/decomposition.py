@@ -0,0 +1,229 @@
+# Copyright (C) 2015-2016: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Domain decomposition of a single model amongst MPI processes.
+
+The grid is split into slabs in the x direction, and each MPI process owns the cells (and the nodes on their lower x face) of one slab.
+Every process builds the whole model, then keeps only the part of the solver arrays for its slab plus a single plane of halo values
+either side, i.e. a plane of cells below the slab (for the magnetic field) and a plane of nodes above the slab (for the electric field).
+The standard field update functions are used on the slab, and the halo values are exchanged with the neighbouring processes after each
+electric and magnetic field update. This satisfies the dependencies of the Yee scheme, i.e. E at x needs H at x and x - 1, and H at x
+needs E at x and x + 1.
+"""
+
+import hashlib
+
+import numpy as np
+
+from gprMax.constants import floattype
+from gprMax.exceptions import CmdInputError
+from gprMax.materials import Material
+from gprMax.pml import PML
+
+
+class SlabDecomposition:
+    """Decomposition of a grid into slabs in the x direction amongst MPI processes."""
+
+    def __init__(self, comm, G):
+        """
+        Args:
+            comm (object): MPI communicator.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        from mpi4py import MPI
+
+        self.comm = comm
+        if G.nx < comm.size:
+            raise CmdInputError('The model has fewer cells in the x direction ({}) than there are MPI processes ({})'.format(G.nx, comm.size))
+
+        # Neighbouring processes (there is no neighbour beyond the faces of the grid)
+        self.left = comm.rank - 1 if comm.rank > 0 else MPI.PROC_NULL
+        self.right = comm.rank + 1 if comm.rank < comm.size - 1 else MPI.PROC_NULL
+
+        # Global size of the grid, range of cells owned, and offset of the slab (including halo) in the grid
+        self.nx = G.nx
+        self.cs = G.nx * comm.rank // comm.size
+        self.cf = G.nx * (comm.rank + 1) // comm.size
+        self.offset = max(self.cs - 1, 0)
+
+        # Range of x coordinates of field components owned, in the coordinates of the slab (the last slab also owns the nodes on the last face of the grid)
+        self.xs = self.cs - self.offset
+        self.xf = self.cf - self.offset + (1 if self.right == MPI.PROC_NULL else 0)
+
+        # Magnetic dipoles anywhere in the model require an extra exchange of magnetic field components (every process must take part)
+        self.magneticdipoles = bool(G.magneticdipoles)
+
+        # Indices in the whole model of the receivers and transmission lines in the slab
+        self.rxindices = []
+        self.tlindices = []
+
+    def owns(self, x):
+        """Checks if a node or cell in the x direction is owned by the slab.
+
+        Args:
+            x (int): Coordinate in the x direction in the grid.
+
+        Returns:
+            (bool): True if the slab owns the node or cell.
+        """
+
+        return self.xs <= x - self.offset < self.xf
+
+    def decompose(self, G):
+        """Replaces the solver arrays, PMLs, sources and receivers of a grid with those of the slab. Positions in the x direction are converted to the coordinates of the slab.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        # Every process must have built the same model, e.g. fractals must be generated using a seed
+        if len(set(self.comm.allgather(hashlib.sha1(np.ascontiguousarray(G.ID)).hexdigest()))) > 1:
+            raise CmdInputError('The model built by each MPI process is different; fractals must use a seed with domain decomposition')
+
+        # Arrays only used to build the model are not required by the solver
+        G.release_build_arrays()
+
+        G.nx = self.cf - self.offset
+        G.ID = G.ID[:, self.offset:self.cf + 1].copy()
+        G.Ex = np.zeros((G.nx, G.ny + 1, G.nz + 1), dtype=floattype)
+        G.Ey = np.zeros((G.nx + 1, G.ny, G.nz + 1), dtype=floattype)
+        G.Ez = np.zeros((G.nx + 1, G.ny + 1, G.nz), dtype=floattype)
+        G.Hx = np.zeros((G.nx + 1, G.ny, G.nz), dtype=floattype)
+        G.Hy = np.zeros((G.nx, G.ny + 1, G.nz), dtype=floattype)
+        G.Hz = np.zeros((G.nx, G.ny, G.nz + 1), dtype=floattype)
+        if Material.maxpoles != 0:
+            G.initialise_temporary_arrays()
+
+        # PMLs in the x direction are kept whole if they overlap the slab (they are only updated within the slab), and others are cropped to the slab
+        pmls = []
+        for pml in G.pmls:
+            if pml.direction in ('xminus', 'xplus'):
+                if pml.xs < self.cf and pml.xf >= self.cs:
+                    pml.xs -= self.offset
+                    pml.xf -= self.offset
+                    pmls.append(pml)
+            else:
+                pmls.append(self.crop_pml(pml))
+        G.pmls = pmls
+
+        G.voltagesources = self.localise(G.voltagesources)
+        G.hertziandipoles = self.localise(G.hertziandipoles)
+        G.magneticdipoles = self.localise(G.magneticdipoles)
+        self.tlindices = [tlindex for tlindex, tl in enumerate(G.transmissionlines) if self.owns(tl.positionx)]
+        G.transmissionlines = self.localise(G.transmissionlines)
+        self.rxindices = [rxindex for rxindex, rx in enumerate(G.rxs) if self.owns(rx.positionx)]
+        G.rxs = self.localise(G.rxs)
+
+    def crop_pml(self, pml):
+        """Crops a PML in the y or z direction to the slab.
+
+        Args:
+            pml (class): PML class instance.
+
+        Returns:
+            cropped (class): PML class instance for the slab, in the coordinates of the slab.
+        """
+
+        xs = max(pml.xs, self.offset)
+        xf = min(pml.xf, self.cf)
+        cropped = PML(direction=pml.direction, xs=xs - self.offset, ys=pml.ys, zs=pml.zs, xf=xf - self.offset, yf=pml.yf, zf=pml.zf, cfs=pml.CFS)
+        for attr in ('ERA', 'ERB', 'ERE', 'ERF', 'HRA', 'HRB', 'HRE', 'HRF'):
+            setattr(cropped, attr, getattr(pml, attr))
+
+        return cropped
+
+    def localise(self, objs):
+        """Selects the sources or receivers within the slab and converts their positions to the coordinates of the slab.
+
+        Args:
+            objs (list): Source or receiver class instances.
+
+        Returns:
+            local (list): Source or receiver class instances within the slab.
+        """
+
+        local = [obj for obj in objs if self.owns(obj.positionx)]
+        for obj in local:
+            obj.positionx -= self.offset
+
+        return local
+
+    def exchange_electric(self, G):
+        """Exchanges the electric field components needed by the magnetic field update with the neighbouring processes, i.e. the y and z components on the first plane of nodes of each slab are sent to the process below.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for field in (G.Ey, G.Ez):
+            self.comm.Sendrecv(field[self.xs], dest=self.left, recvbuf=field[G.nx], source=self.right)
+
+    def exchange_magnetic(self, G):
+        """Exchanges the magnetic field components needed by the electric field update with the neighbouring processes, i.e. the y and z components on the last plane of cells of each slab are sent to the process above.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for field in (G.Hy, G.Hz):
+            self.comm.Sendrecv(field[G.nx - 1], dest=self.right, recvbuf=field[0], source=self.left)
+
+    def output_arrays(self, G):
+        """Creates arrays to store the outputs of the receivers and transmission lines in the slab, arranged like the datasets of an output file so they can be written to by an OutputBuffer.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            arrays (dict): Arrays keyed by the path of the corresponding dataset for the slab.
+        """
+
+        arrays = {}
+        for rxindex, rx in enumerate(G.rxs):
+            for output in rx.outputs:
+                arrays['/rxs/rx' + str(rxindex + 1) + '/' + output] = np.zeros(G.iterations, dtype=floattype)
+        for tlindex in range(len(G.transmissionlines)):
+            for output in ('Vtotal', 'Itotal'):
+                arrays['/tls/tl' + str(tlindex + 1) + '/' + output] = np.zeros(G.iterations, dtype=floattype)
+
+        return arrays
+
+    def gather_outputs(self, arrays, f):
+        """Gathers the outputs of the receivers and transmission lines from every slab and writes them to the output file (by the process with rank 0).
+
+        Args:
+            arrays (dict): Arrays of outputs for the slab from output_arrays.
+            f (file object): File object for the output file on the process with rank 0.
+        """
+
+        # Convert paths to those of the receivers and transmission lines in the whole model
+        outputs = {}
+        for path, array in arrays.items():
+            group, name, output = path.strip('/').split('/')
+            if group == 'rxs':
+                index = self.rxindices[int(name[2:]) - 1]
+            else:
+                index = self.tlindices[int(name[2:]) - 1]
+            outputs['/' + group + '/' + name.rstrip('0123456789') + str(index + 1) + '/' + output] = array
+
+        gathered = self.comm.gather(outputs, root=0)
+        if self.comm.rank == 0:
+            for outputs in gathered:
+                for path, array in outputs.items():
+                    f[path][:] = array
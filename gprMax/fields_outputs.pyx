@@ -0,0 +1,71 @@
+# Copyright (C) 2015-2016: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+cimport numpy as np
+from cython.parallel import prange
+from gprMax.constants cimport floattype_t
+
+
+cpdef store_outputs(int step, int nthreads, floattype_t dx, floattype_t dy, floattype_t dz, int[:, :] rxpositions, np.uint8_t[:, :] rxoutputs, floattype_t[:, :, :] rxdata, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
+    """This function stores field component values and currents for every receiver at a single timestep.
+
+    Args:
+        step (int): Index of timestep in receiver data array
+        nthreads (int): Number of threads to use
+        dx, dy, dz (float): Spatial discretisation
+        rxpositions (memoryview): Access to receiver positions (receivers x 3)
+        rxoutputs (memoryview): Access to mask of outputs required for each receiver (receivers x outputs), outputs ordered as Rx.availableoutputs
+        rxdata (memoryview): Access to receiver data array (receivers x outputs x timesteps)
+        E, H (memoryviews): Access to field component arrays
+    """
+
+    cdef int n, x, y, z
+    cdef int nrx = rxpositions.shape[0]
+
+    for n in prange(0, nrx, nogil=True, schedule='static', num_threads=nthreads):
+        x = rxpositions[n, 0]
+        y = rxpositions[n, 1]
+        z = rxpositions[n, 2]
+        if rxoutputs[n, 0]:
+            rxdata[n, 0, step] = Ex[x, y, z]
+        if rxoutputs[n, 1]:
+            rxdata[n, 1, step] = Ey[x, y, z]
+        if rxoutputs[n, 2]:
+            rxdata[n, 2, step] = Ez[x, y, z]
+        if rxoutputs[n, 3]:
+            rxdata[n, 3, step] = Hx[x, y, z]
+        if rxoutputs[n, 4]:
+            rxdata[n, 4, step] = Hy[x, y, z]
+        if rxoutputs[n, 5]:
+            rxdata[n, 5, step] = Hz[x, y, z]
+        if rxoutputs[n, 6]:
+            if y == 0 or z == 0:
+                rxdata[n, 6, step] = 0
+            else:
+                rxdata[n, 6, step] = dy * (Hy[x, y, z - 1] - Hy[x, y, z]) + dz * (Hz[x, y, z] - Hz[x, y - 1, z])
+        if rxoutputs[n, 7]:
+            if x == 0 or z == 0:
+                rxdata[n, 7, step] = 0
+            else:
+                rxdata[n, 7, step] = dx * (Hx[x, y, z] - Hx[x, y, z - 1]) + dz * (Hz[x - 1, y, z] - Hz[x, y, z])
+        if rxoutputs[n, 8]:
+            if x == 0 or y == 0:
+                rxdata[n, 8, step] = 0
+            else:
+                rxdata[n, 8, step] = dx * (Hx[x, y - 1, z] - Hx[x, y, z]) + dy * (Hy[x, y, z] - Hy[x - 1, y, z])
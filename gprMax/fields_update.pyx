@@ -18,14 +18,24 @@
 
 import numpy as np
 cimport numpy as np
+cimport cython
+cimport openmp
 from cython.parallel import prange
-from gprMax.constants cimport floattype_t, complextype_t
+from gprMax.constants cimport floattype_t, dispersivetype_t, indextype_t
+
+
+cdef inline floattype_t real(dispersivetype_t x) nogil:
+    """Real part of a dispersive coefficient or temporary value, i.e. the value itself if they are real (all poles are Debye)."""
+    if dispersivetype_t is floattype_t:
+        return x
+    else:
+        return x.real
 
 
 #########################################
 # Electric field updates - Ex component #
 #########################################
-cpdef update_ex(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, np.uint32_t[:, :, :, :] ID, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
+cpdef update_ex(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
     """This function updates the Ex field components.
         
     Args:
@@ -46,7 +56,7 @@ cpdef update_ex(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updateco
                     Ex[i, j, k] = updatecoeffsE[listIndex, 0] * Ex[i, j, k] + updatecoeffsE[listIndex, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[listIndex, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
 
 
-cpdef update_ex_dispersive_multipole_A(int nx, int ny, int nz, int nthreads, int maxpoles, floattype_t[:, :] updatecoeffsE, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Tx, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
+cpdef update_ex_dispersive_multipole_A(int nx, int ny, int nz, int nthreads, int maxpoles, floattype_t[:, :] updatecoeffsE, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Tx, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
     """This function updates the Ex field components when dispersive materials (with multiple poles) are present.
         
     Args:
@@ -68,11 +78,11 @@ cpdef update_ex_dispersive_multipole_A(int nx, int ny, int nz, int nthreads, int
                     listIndex = ID[0, i, j, k]
                     phi = 0.0
                     for p in range(0, maxpoles):
-                        phi = phi + updatecoeffsdispersive[listIndex, p * 3].real * Tx[p, i, j, k].real
+                        phi = phi + real(updatecoeffsdispersive[listIndex, p * 3]) * real(Tx[p, i, j, k])
                         Tx[p, i, j, k] = updatecoeffsdispersive[listIndex, 1 + (p * 3)] * Tx[p, i, j, k] + updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ex[i, j, k]
                     Ex[i, j, k] = updatecoeffsE[listIndex, 0] * Ex[i, j, k] + updatecoeffsE[listIndex, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[listIndex, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[listIndex, 4] * phi
 
-cpdef update_ex_dispersive_multipole_B(int nx, int ny, int nz, int nthreads, int maxpoles, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Tx, floattype_t[:, :, :] Ex):
+cpdef update_ex_dispersive_multipole_B(int nx, int ny, int nz, int nthreads, int maxpoles, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Tx, floattype_t[:, :, :] Ex):
     """This function updates the Ex field components when dispersive materials (with multiple poles) are present.
         
     Args:
@@ -95,7 +105,7 @@ cpdef update_ex_dispersive_multipole_B(int nx, int ny, int nz, int nthreads, int
                         Tx[p, i, j, k] = Tx[p, i, j, k] - updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ex[i, j, k]
 
 
-cpdef update_ex_dispersive_1pole_A(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Tx, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
+cpdef update_ex_dispersive_1pole_A(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Tx, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
     """This function updates the Ex field components when dispersive materials (with 1 pole) are present.
         
     Args:
@@ -114,12 +124,12 @@ cpdef update_ex_dispersive_1pole_A(int nx, int ny, int nz, int nthreads, floatty
             for j in range(1, ny):
                 for k in range(1, nz):
                     listIndex = ID[0, i, j, k]
-                    phi = updatecoeffsdispersive[listIndex, 0].real * Tx[0, i, j, k].real
+                    phi = real(updatecoeffsdispersive[listIndex, 0]) * real(Tx[0, i, j, k])
                     Tx[0, i, j, k] = updatecoeffsdispersive[listIndex, 1] * Tx[0, i, j, k] + updatecoeffsdispersive[listIndex, 2] * Ex[i, j, k]
                     Ex[i, j, k] = updatecoeffsE[listIndex, 0] * Ex[i, j, k] + updatecoeffsE[listIndex, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[listIndex, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[listIndex, 4] * phi
 
 
-cpdef update_ex_dispersive_1pole_B(int nx, int ny, int nz, int nthreads, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Tx, floattype_t[:, :, :] Ex):
+cpdef update_ex_dispersive_1pole_B(int nx, int ny, int nz, int nthreads, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Tx, floattype_t[:, :, :] Ex):
     """This function updates the Ex field components when dispersive materials (with 1 pole) are present.
         
     Args:
@@ -140,10 +150,60 @@ cpdef update_ex_dispersive_1pole_B(int nx, int ny, int nz, int nthreads, complex
                     Tx[0, i, j, k] = Tx[0, i, j, k] - updatecoeffsdispersive[listIndex, 2] * Ex[i, j, k]
 
 
+cpdef update_ex_dispersive_sparse_A(int nthreads, int maxpoles, floattype_t[:, :] updatecoeffsE, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, Py_ssize_t[:, ::1] runs, dispersivetype_t[:, ::1] Tx, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
+    """This function updates the Ex field components with dispersive materials (sparse dispersive mode).
+        
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        runs (memoryview): Access to runs of field components with dispersive materials in the z direction (runs x 5: x, y, first and last (+1) z coordinates, index of first field component in temporary array)
+        updatecoeffs, T, ID, E, H (memoryviews): Access to update coeffients, temporary (poles x field components), ID and field component arrays
+    """
+    
+    cdef Py_ssize_t r, n
+    cdef int i, j, k, listIndex, p
+    cdef float phi = 0.0
+
+    for r in prange(0, runs.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = runs[r, 0]
+        j = runs[r, 1]
+        for k in range(runs[r, 2], runs[r, 3]):
+            n = runs[r, 4] + k - runs[r, 2]
+            listIndex = ID[0, i, j, k]
+            phi = 0.0
+            for p in range(0, maxpoles):
+                phi = phi + real(updatecoeffsdispersive[listIndex, p * 3]) * real(Tx[p, n])
+                Tx[p, n] = updatecoeffsdispersive[listIndex, 1 + (p * 3)] * Tx[p, n] + updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ex[i, j, k]
+            Ex[i, j, k] = updatecoeffsE[listIndex, 0] * Ex[i, j, k] + updatecoeffsE[listIndex, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[listIndex, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[listIndex, 4] * phi
+
+
+cpdef update_ex_dispersive_sparse_B(int nthreads, int maxpoles, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, Py_ssize_t[:, ::1] runs, dispersivetype_t[:, ::1] Tx, floattype_t[:, :, :] Ex):
+    """This function updates the temporary values of the Ex field components with dispersive materials (sparse dispersive mode).
+        
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        runs (memoryview): Access to runs of field components with dispersive materials in the z direction (runs x 5: x, y, first and last (+1) z coordinates, index of first field component in temporary array)
+        updatecoeffs, T, ID, E (memoryviews): Access to update coeffients, temporary (poles x field components), ID and field component arrays
+    """
+    
+    cdef Py_ssize_t r, n
+    cdef int i, j, k, listIndex, p
+
+    for r in prange(0, runs.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = runs[r, 0]
+        j = runs[r, 1]
+        for k in range(runs[r, 2], runs[r, 3]):
+            n = runs[r, 4] + k - runs[r, 2]
+            listIndex = ID[0, i, j, k]
+            for p in range(0, maxpoles):
+                Tx[p, n] = Tx[p, n] - updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ex[i, j, k]
+
+
 #########################################
 # Electric field updates - Ey component #
 #########################################
-cpdef update_ey(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, np.uint32_t[:, :, :, :] ID, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hz):
+cpdef update_ey(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hz):
     """This function updates the Ey field components.
         
     Args:
@@ -164,7 +224,7 @@ cpdef update_ey(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updateco
                     Ey[i, j, k] = updatecoeffsE[listIndex, 0] * Ey[i, j, k] + updatecoeffsE[listIndex, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[listIndex, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
 
 
-cpdef update_ey_dispersive_multipole_A(int nx, int ny, int nz, int nthreads, int maxpoles, floattype_t[:, :] updatecoeffsE, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Ty, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hz):
+cpdef update_ey_dispersive_multipole_A(int nx, int ny, int nz, int nthreads, int maxpoles, floattype_t[:, :] updatecoeffsE, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Ty, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hz):
     """This function updates the Ey field components when dispersive materials (with multiple poles) are present.
         
     Args:
@@ -186,12 +246,12 @@ cpdef update_ey_dispersive_multipole_A(int nx, int ny, int nz, int nthreads, int
                     listIndex = ID[1, i, j, k]
                     phi = 0.0
                     for p in range(0, maxpoles):
-                        phi = phi + updatecoeffsdispersive[listIndex, p * 3].real * Ty[p, i, j, k].real
+                        phi = phi + real(updatecoeffsdispersive[listIndex, p * 3]) * real(Ty[p, i, j, k])
                         Ty[p, i, j, k] = updatecoeffsdispersive[listIndex, 1 + (p * 3)] * Ty[p, i, j, k] + updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ey[i, j, k]
                     Ey[i, j, k] = updatecoeffsE[listIndex, 0] * Ey[i, j, k] + updatecoeffsE[listIndex, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[listIndex, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[listIndex, 4] * phi
 
 
-cpdef update_ey_dispersive_multipole_B(int nx, int ny, int nz, int nthreads, int maxpoles, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Ty, floattype_t[:, :, :] Ey):
+cpdef update_ey_dispersive_multipole_B(int nx, int ny, int nz, int nthreads, int maxpoles, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Ty, floattype_t[:, :, :] Ey):
     """This function updates the Ey field components when dispersive materials (with multiple poles) are present.
         
     Args:
@@ -214,7 +274,7 @@ cpdef update_ey_dispersive_multipole_B(int nx, int ny, int nz, int nthreads, int
                         Ty[p, i, j, k] = Ty[p, i, j, k] - updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ey[i, j, k]
 
 
-cpdef update_ey_dispersive_1pole_A(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Ty, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hz):
+cpdef update_ey_dispersive_1pole_A(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Ty, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hz):
     """This function updates the Ey field components when dispersive materials (with 1 pole) are present.
         
     Args:
@@ -233,12 +293,12 @@ cpdef update_ey_dispersive_1pole_A(int nx, int ny, int nz, int nthreads, floatty
             for j in range(0, ny):
                 for k in range(1, nz):
                     listIndex = ID[1, i, j, k]
-                    phi = updatecoeffsdispersive[listIndex, 0].real * Ty[0, i, j, k].real
+                    phi = real(updatecoeffsdispersive[listIndex, 0]) * real(Ty[0, i, j, k])
                     Ty[0, i, j, k] = updatecoeffsdispersive[listIndex, 1] * Ty[0, i, j, k] + updatecoeffsdispersive[listIndex, 2] * Ey[i, j, k]
                     Ey[i, j, k] = updatecoeffsE[listIndex, 0] * Ey[i, j, k] + updatecoeffsE[listIndex, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[listIndex, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[listIndex, 4] * phi
 
 
-cpdef update_ey_dispersive_1pole_B(int nx, int ny, int nz, int nthreads, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Ty, floattype_t[:, :, :] Ey):
+cpdef update_ey_dispersive_1pole_B(int nx, int ny, int nz, int nthreads, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Ty, floattype_t[:, :, :] Ey):
     """This function updates the Ey field components when dispersive materials (with 1 pole) are present.
         
     Args:
@@ -259,10 +319,60 @@ cpdef update_ey_dispersive_1pole_B(int nx, int ny, int nz, int nthreads, complex
                     Ty[0, i, j, k] = Ty[0, i, j, k] - updatecoeffsdispersive[listIndex, 2] * Ey[i, j, k]
 
 
+cpdef update_ey_dispersive_sparse_A(int nthreads, int maxpoles, floattype_t[:, :] updatecoeffsE, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, Py_ssize_t[:, ::1] runs, dispersivetype_t[:, ::1] Ty, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hz):
+    """This function updates the Ey field components with dispersive materials (sparse dispersive mode).
+        
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        runs (memoryview): Access to runs of field components with dispersive materials in the z direction (runs x 5: x, y, first and last (+1) z coordinates, index of first field component in temporary array)
+        updatecoeffs, T, ID, E, H (memoryviews): Access to update coeffients, temporary (poles x field components), ID and field component arrays
+    """
+    
+    cdef Py_ssize_t r, n
+    cdef int i, j, k, listIndex, p
+    cdef float phi = 0.0
+
+    for r in prange(0, runs.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = runs[r, 0]
+        j = runs[r, 1]
+        for k in range(runs[r, 2], runs[r, 3]):
+            n = runs[r, 4] + k - runs[r, 2]
+            listIndex = ID[1, i, j, k]
+            phi = 0.0
+            for p in range(0, maxpoles):
+                phi = phi + real(updatecoeffsdispersive[listIndex, p * 3]) * real(Ty[p, n])
+                Ty[p, n] = updatecoeffsdispersive[listIndex, 1 + (p * 3)] * Ty[p, n] + updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ey[i, j, k]
+            Ey[i, j, k] = updatecoeffsE[listIndex, 0] * Ey[i, j, k] + updatecoeffsE[listIndex, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[listIndex, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[listIndex, 4] * phi
+
+
+cpdef update_ey_dispersive_sparse_B(int nthreads, int maxpoles, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, Py_ssize_t[:, ::1] runs, dispersivetype_t[:, ::1] Ty, floattype_t[:, :, :] Ey):
+    """This function updates the temporary values of the Ey field components with dispersive materials (sparse dispersive mode).
+        
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        runs (memoryview): Access to runs of field components with dispersive materials in the z direction (runs x 5: x, y, first and last (+1) z coordinates, index of first field component in temporary array)
+        updatecoeffs, T, ID, E (memoryviews): Access to update coeffients, temporary (poles x field components), ID and field component arrays
+    """
+    
+    cdef Py_ssize_t r, n
+    cdef int i, j, k, listIndex, p
+
+    for r in prange(0, runs.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = runs[r, 0]
+        j = runs[r, 1]
+        for k in range(runs[r, 2], runs[r, 3]):
+            n = runs[r, 4] + k - runs[r, 2]
+            listIndex = ID[1, i, j, k]
+            for p in range(0, maxpoles):
+                Ty[p, n] = Ty[p, n] - updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ey[i, j, k]
+
+
 #########################################
 # Electric field updates - Ez component #
 #########################################
-cpdef update_ez(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, np.uint32_t[:, :, :, :] ID, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy):
+cpdef update_ez(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy):
     """This function updates the Ez field components.
         
     Args:
@@ -283,7 +393,7 @@ cpdef update_ez(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updateco
                     Ez[i, j, k] = updatecoeffsE[listIndex, 0] * Ez[i, j, k] + updatecoeffsE[listIndex, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[listIndex, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
 
 
-cpdef update_ez_dispersive_multipole_A(int nx, int ny, int nz, int nthreads, int maxpoles, floattype_t[:, :] updatecoeffsE, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Tz, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy):
+cpdef update_ez_dispersive_multipole_A(int nx, int ny, int nz, int nthreads, int maxpoles, floattype_t[:, :] updatecoeffsE, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Tz, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy):
     """This function updates the Ez field components when dispersive materials (with multiple poles) are present.
         
     Args:
@@ -305,12 +415,12 @@ cpdef update_ez_dispersive_multipole_A(int nx, int ny, int nz, int nthreads, int
                     listIndex = ID[2, i, j, k]
                     phi = 0.0
                     for p in range(0, maxpoles):
-                        phi = phi + updatecoeffsdispersive[listIndex, p * 3].real * Tz[p, i, j, k].real
+                        phi = phi + real(updatecoeffsdispersive[listIndex, p * 3]) * real(Tz[p, i, j, k])
                         Tz[p, i, j, k] = updatecoeffsdispersive[listIndex, 1 + (p * 3)] * Tz[p, i, j, k] + updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ez[i, j, k]
                     Ez[i, j, k] = updatecoeffsE[listIndex, 0] * Ez[i, j, k] + updatecoeffsE[listIndex, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[listIndex, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[listIndex, 4] * phi
 
 
-cpdef update_ez_dispersive_multipole_B(int nx, int ny, int nz, int nthreads, int maxpoles, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Tz, floattype_t[:, :, :] Ez):
+cpdef update_ez_dispersive_multipole_B(int nx, int ny, int nz, int nthreads, int maxpoles, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Tz, floattype_t[:, :, :] Ez):
     """This function updates the Ez field components when dispersive materials (with multiple poles) are present.
         
     Args:
@@ -333,7 +443,7 @@ cpdef update_ez_dispersive_multipole_B(int nx, int ny, int nz, int nthreads, int
                         Tz[p, i, j, k] = Tz[p, i, j, k] - updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ez[i, j, k]
 
 
-cpdef update_ez_dispersive_1pole_A(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Tz, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy):
+cpdef update_ez_dispersive_1pole_A(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Tz, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy):
     """This function updates the Ez field components when dispersive materials (with 1 pole) are present.
         
     Args:
@@ -352,12 +462,12 @@ cpdef update_ez_dispersive_1pole_A(int nx, int ny, int nz, int nthreads, floatty
             for j in range(1, ny):
                 for k in range(0, nz):
                     listIndex = ID[2, i, j, k]
-                    phi = updatecoeffsdispersive[listIndex, 0].real * Tz[0, i, j, k].real
+                    phi = real(updatecoeffsdispersive[listIndex, 0]) * real(Tz[0, i, j, k])
                     Tz[0, i, j, k] = updatecoeffsdispersive[listIndex, 1] * Tz[0, i, j, k] + updatecoeffsdispersive[listIndex, 2] * Ez[i, j, k]
                     Ez[i, j, k] = updatecoeffsE[listIndex, 0] * Ez[i, j, k] + updatecoeffsE[listIndex, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[listIndex, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[listIndex, 4] * phi
 
 
-cpdef update_ez_dispersive_1pole_B(int nx, int ny, int nz, int nthreads, complextype_t[:, :] updatecoeffsdispersive, np.uint32_t[:, :, :, :] ID, complextype_t[:, :, :, :] Tz, floattype_t[:, :, :] Ez):
+cpdef update_ez_dispersive_1pole_B(int nx, int ny, int nz, int nthreads, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, dispersivetype_t[:, :, :, :] Tz, floattype_t[:, :, :] Ez):
     """This function updates the Ez field components when dispersive materials (with 1 pole) are present.
         
     Args:
@@ -378,10 +488,94 @@ cpdef update_ez_dispersive_1pole_B(int nx, int ny, int nz, int nthreads, complex
                     Tz[0, i, j, k] = Tz[0, i, j, k] - updatecoeffsdispersive[listIndex, 2] * Ez[i, j, k]
 
 
+cpdef update_ez_dispersive_sparse_A(int nthreads, int maxpoles, floattype_t[:, :] updatecoeffsE, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, Py_ssize_t[:, ::1] runs, dispersivetype_t[:, ::1] Tz, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy):
+    """This function updates the Ez field components with dispersive materials (sparse dispersive mode).
+        
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        runs (memoryview): Access to runs of field components with dispersive materials in the z direction (runs x 5: x, y, first and last (+1) z coordinates, index of first field component in temporary array)
+        updatecoeffs, T, ID, E, H (memoryviews): Access to update coeffients, temporary (poles x field components), ID and field component arrays
+    """
+    
+    cdef Py_ssize_t r, n
+    cdef int i, j, k, listIndex, p
+    cdef float phi = 0.0
+
+    for r in prange(0, runs.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = runs[r, 0]
+        j = runs[r, 1]
+        for k in range(runs[r, 2], runs[r, 3]):
+            n = runs[r, 4] + k - runs[r, 2]
+            listIndex = ID[2, i, j, k]
+            phi = 0.0
+            for p in range(0, maxpoles):
+                phi = phi + real(updatecoeffsdispersive[listIndex, p * 3]) * real(Tz[p, n])
+                Tz[p, n] = updatecoeffsdispersive[listIndex, 1 + (p * 3)] * Tz[p, n] + updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ez[i, j, k]
+            Ez[i, j, k] = updatecoeffsE[listIndex, 0] * Ez[i, j, k] + updatecoeffsE[listIndex, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[listIndex, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[listIndex, 4] * phi
+
+
+cpdef update_ez_dispersive_sparse_B(int nthreads, int maxpoles, dispersivetype_t[:, :] updatecoeffsdispersive, indextype_t[:, :, :, :] ID, Py_ssize_t[:, ::1] runs, dispersivetype_t[:, ::1] Tz, floattype_t[:, :, :] Ez):
+    """This function updates the temporary values of the Ez field components with dispersive materials (sparse dispersive mode).
+        
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        runs (memoryview): Access to runs of field components with dispersive materials in the z direction (runs x 5: x, y, first and last (+1) z coordinates, index of first field component in temporary array)
+        updatecoeffs, T, ID, E (memoryviews): Access to update coeffients, temporary (poles x field components), ID and field component arrays
+    """
+    
+    cdef Py_ssize_t r, n
+    cdef int i, j, k, listIndex, p
+
+    for r in prange(0, runs.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = runs[r, 0]
+        j = runs[r, 1]
+        for k in range(runs[r, 2], runs[r, 3]):
+            n = runs[r, 4] + k - runs[r, 2]
+            listIndex = ID[2, i, j, k]
+            for p in range(0, maxpoles):
+                Tz[p, n] = Tz[p, n] - updatecoeffsdispersive[listIndex, 2 + (p * 3)] * Ez[i, j, k]
+
+
+#####################################################
+# Electric field updates - fused Ex, Ey, Ez update  #
+#####################################################
+cpdef update_electric(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
+    """This function updates the Ex, Ey and Ez field components in a single pass over the grid.
+        
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+    
+    cdef int i, j, k, listIndex
+    cdef bint updateEx = ny != 1 and nz != 1
+    cdef bint updateEy = nx != 1 and nz != 1
+    cdef bint updateEz = nx != 1 and ny != 1
+
+    for i in prange(0, nx, nogil=True, schedule='static', chunksize=1, num_threads=nthreads):
+        for j in range(0, ny):
+            if updateEz and i > 0 and j > 0:
+                listIndex = ID[2, i, j, 0]
+                Ez[i, j, 0] = updatecoeffsE[listIndex, 0] * Ez[i, j, 0] + updatecoeffsE[listIndex, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[listIndex, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+            for k in range(1, nz):
+                if updateEx and j > 0:
+                    listIndex = ID[0, i, j, k]
+                    Ex[i, j, k] = updatecoeffsE[listIndex, 0] * Ex[i, j, k] + updatecoeffsE[listIndex, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[listIndex, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                if updateEy and i > 0:
+                    listIndex = ID[1, i, j, k]
+                    Ey[i, j, k] = updatecoeffsE[listIndex, 0] * Ey[i, j, k] + updatecoeffsE[listIndex, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[listIndex, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                if updateEz and i > 0 and j > 0:
+                    listIndex = ID[2, i, j, k]
+                    Ez[i, j, k] = updatecoeffsE[listIndex, 0] * Ez[i, j, k] + updatecoeffsE[listIndex, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[listIndex, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+
 #########################################
 # Magnetic field updates - Hx component #
 #########################################
-cpdef update_hx(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsH, np.uint32_t[:, :, :, :] ID, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez):
+cpdef update_hx(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsH, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez):
     """This function updates the Hx field components.
         
     Args:
@@ -405,7 +599,7 @@ cpdef update_hx(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updateco
 #########################################
 # Magnetic field updates - Hy component #
 #########################################
-cpdef update_hy(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsH, np.uint32_t[:, :, :, :] ID, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ez):
+cpdef update_hy(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsH, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ez):
     """This function updates the Hy field components.
         
     Args:
@@ -429,7 +623,7 @@ cpdef update_hy(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updateco
 #########################################
 # Magnetic field updates - Hz component #
 #########################################
-cpdef update_hz(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsH, np.uint32_t[:, :, :, :] ID, floattype_t[:, :, :] Hz, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey):
+cpdef update_hz(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsH, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Hz, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey):
     """This function updates the Hz field components.
         
     Args:
@@ -449,3 +643,193 @@ cpdef update_hz(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updateco
                     listIndex = ID[5, i, j, k]
                     Hz[i, j, k] = updatecoeffsH[listIndex, 0] * Hz[i, j, k] - updatecoeffsH[listIndex, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[listIndex, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
 
+
+#####################################################
+# Magnetic field updates - fused Hx, Hy, Hz update  #
+#####################################################
+cpdef update_magnetic(int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsH, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez):
+    """This function updates the Hx, Hy and Hz field components in a single pass over the grid.
+        
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+    
+    cdef int i, j, k, listIndex
+    cdef bint updateHx = nx != 1
+    cdef bint updateHy = ny != 1
+    cdef bint updateHz = nz != 1
+
+    for i in prange(0, nx, nogil=True, schedule='static', chunksize=1, num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(0, nz):
+                if updateHx and i > 0:
+                    listIndex = ID[3, i, j, k]
+                    Hx[i, j, k] = updatecoeffsH[listIndex, 0] * Hx[i, j, k] - updatecoeffsH[listIndex, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[listIndex, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+                if updateHy and j > 0:
+                    listIndex = ID[4, i, j, k]
+                    Hy[i, j, k] = updatecoeffsH[listIndex, 0] * Hy[i, j, k] - updatecoeffsH[listIndex, 3] * (Ex[i, j, k + 1] - Ex[i, j, k]) + updatecoeffsH[listIndex, 1] * (Ez[i + 1, j, k] - Ez[i, j, k])
+                if updateHz and k > 0:
+                    listIndex = ID[5, i, j, k]
+                    Hz[i, j, k] = updatecoeffsH[listIndex, 0] * Hz[i, j, k] - updatecoeffsH[listIndex, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[listIndex, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
+
+
+#####################################################
+# Tiled (cache-blocked) fused field updates         #
+#####################################################
+cpdef set_omp_schedule(str schedule, int chunksize):
+    """This function sets the OpenMP schedule used by the tiled field update kernels.
+
+    Args:
+        schedule (str): OpenMP schedule - static, dynamic, or guided
+        chunksize (int): Number of tiles per chunk (zero or less for the default chunk size)
+    """
+
+    if schedule == 'static':
+        openmp.omp_set_schedule(openmp.omp_sched_static, chunksize)
+    elif schedule == 'dynamic':
+        openmp.omp_set_schedule(openmp.omp_sched_dynamic, chunksize)
+    elif schedule == 'guided':
+        openmp.omp_set_schedule(openmp.omp_sched_guided, chunksize)
+
+
+@cython.cdivision(True)
+cpdef update_electric_tiled(int nx, int ny, int nz, int nthreads, int tilej, int tilek, floattype_t[:, :] updatecoeffsE, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
+    """This function updates the Ex, Ey and Ez field components by walking the grid in tiles in the y and z directions. Tiles are distributed amongst threads using the schedule set by set_omp_schedule.
+        
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        tilej, tilek (int): Size of tiles in cells in the y and z directions
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+    
+    cdef int i, j, k, t, js, jf, ks, kf, listIndex
+    cdef int ntilesj = (ny + tilej - 1) / tilej
+    cdef int ntilesk = (nz + tilek - 1) / tilek
+    cdef bint updateEx = ny != 1 and nz != 1
+    cdef bint updateEy = nx != 1 and nz != 1
+    cdef bint updateEz = nx != 1 and ny != 1
+
+    for t in prange(0, ntilesj * ntilesk, nogil=True, schedule='runtime', num_threads=nthreads):
+        js = (t / ntilesk) * tilej
+        jf = min(js + tilej, ny)
+        ks = (t % ntilesk) * tilek
+        kf = min(ks + tilek, nz)
+        for i in range(0, nx):
+            for j in range(js, jf):
+                for k in range(ks, kf):
+                    if updateEx and j > 0 and k > 0:
+                        listIndex = ID[0, i, j, k]
+                        Ex[i, j, k] = updatecoeffsE[listIndex, 0] * Ex[i, j, k] + updatecoeffsE[listIndex, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[listIndex, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                    if updateEy and i > 0 and k > 0:
+                        listIndex = ID[1, i, j, k]
+                        Ey[i, j, k] = updatecoeffsE[listIndex, 0] * Ey[i, j, k] + updatecoeffsE[listIndex, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[listIndex, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                    if updateEz and i > 0 and j > 0:
+                        listIndex = ID[2, i, j, k]
+                        Ez[i, j, k] = updatecoeffsE[listIndex, 0] * Ez[i, j, k] + updatecoeffsE[listIndex, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[listIndex, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+
+@cython.cdivision(True)
+cpdef update_magnetic_tiled(int nx, int ny, int nz, int nthreads, int tilej, int tilek, floattype_t[:, :] updatecoeffsH, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez):
+    """This function updates the Hx, Hy and Hz field components by walking the grid in tiles in the y and z directions. Tiles are distributed amongst threads using the schedule set by set_omp_schedule.
+        
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        tilej, tilek (int): Size of tiles in cells in the y and z directions
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+    
+    cdef int i, j, k, t, js, jf, ks, kf, listIndex
+    cdef int ntilesj = (ny + tilej - 1) / tilej
+    cdef int ntilesk = (nz + tilek - 1) / tilek
+    cdef bint updateHx = nx != 1
+    cdef bint updateHy = ny != 1
+    cdef bint updateHz = nz != 1
+
+    for t in prange(0, ntilesj * ntilesk, nogil=True, schedule='runtime', num_threads=nthreads):
+        js = (t / ntilesk) * tilej
+        jf = min(js + tilej, ny)
+        ks = (t % ntilesk) * tilek
+        kf = min(ks + tilek, nz)
+        for i in range(0, nx):
+            for j in range(js, jf):
+                for k in range(ks, kf):
+                    if updateHx and i > 0:
+                        listIndex = ID[3, i, j, k]
+                        Hx[i, j, k] = updatecoeffsH[listIndex, 0] * Hx[i, j, k] - updatecoeffsH[listIndex, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[listIndex, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+                    if updateHy and j > 0:
+                        listIndex = ID[4, i, j, k]
+                        Hy[i, j, k] = updatecoeffsH[listIndex, 0] * Hy[i, j, k] - updatecoeffsH[listIndex, 3] * (Ex[i, j, k + 1] - Ex[i, j, k]) + updatecoeffsH[listIndex, 1] * (Ez[i + 1, j, k] - Ez[i, j, k])
+                    if updateHz and k > 0:
+                        listIndex = ID[5, i, j, k]
+                        Hz[i, j, k] = updatecoeffsH[listIndex, 0] * Hz[i, j, k] - updatecoeffsH[listIndex, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[listIndex, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
+
+
+#####################################################
+# Fused field updates for a range of x coordinates  #
+#####################################################
+cpdef update_electric_slab(int xs, int xf, int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsE, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
+    """This function updates the Ex, Ey and Ez field components for a range of x coordinates. It is parallelised in the y direction as the range is usually only a few cells.
+        
+    Args:
+        xs, xf (int): Range of x coordinates to update
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+    
+    cdef int i, j, k, listIndex
+    cdef bint updateEx = ny != 1 and nz != 1
+    cdef bint updateEy = nx != 1 and nz != 1
+    cdef bint updateEz = nx != 1 and ny != 1
+
+    if xf > nx:
+        xf = nx
+
+    for j in prange(0, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for i in range(xs, xf):
+            for k in range(0, nz):
+                if updateEx and j > 0 and k > 0:
+                    listIndex = ID[0, i, j, k]
+                    Ex[i, j, k] = updatecoeffsE[listIndex, 0] * Ex[i, j, k] + updatecoeffsE[listIndex, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[listIndex, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                if updateEy and i > 0 and k > 0:
+                    listIndex = ID[1, i, j, k]
+                    Ey[i, j, k] = updatecoeffsE[listIndex, 0] * Ey[i, j, k] + updatecoeffsE[listIndex, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[listIndex, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                if updateEz and i > 0 and j > 0:
+                    listIndex = ID[2, i, j, k]
+                    Ez[i, j, k] = updatecoeffsE[listIndex, 0] * Ez[i, j, k] + updatecoeffsE[listIndex, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[listIndex, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+
+cpdef update_magnetic_slab(int xs, int xf, int nx, int ny, int nz, int nthreads, floattype_t[:, :] updatecoeffsH, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez):
+    """This function updates the Hx, Hy and Hz field components for a range of x coordinates. It is parallelised in the y direction as the range is usually only a few cells.
+        
+    Args:
+        xs, xf (int): Range of x coordinates to update
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+    
+    cdef int i, j, k, listIndex
+    cdef bint updateHx = nx != 1
+    cdef bint updateHy = ny != 1
+    cdef bint updateHz = nz != 1
+
+    if xf > nx:
+        xf = nx
+
+    for j in prange(0, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for i in range(xs, xf):
+            for k in range(0, nz):
+                if updateHx and i > 0:
+                    listIndex = ID[3, i, j, k]
+                    Hx[i, j, k] = updatecoeffsH[listIndex, 0] * Hx[i, j, k] - updatecoeffsH[listIndex, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[listIndex, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+                if updateHy and j > 0:
+                    listIndex = ID[4, i, j, k]
+                    Hy[i, j, k] = updatecoeffsH[listIndex, 0] * Hy[i, j, k] - updatecoeffsH[listIndex, 3] * (Ex[i, j, k + 1] - Ex[i, j, k]) + updatecoeffsH[listIndex, 1] * (Ez[i + 1, j, k] - Ez[i, j, k])
+                if updateHz and k > 0:
+                    listIndex = ID[5, i, j, k]
+                    Hz[i, j, k] = updatecoeffsH[listIndex, 0] * Hz[i, j, k] - updatecoeffsH[listIndex, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[listIndex, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
@@ -16,13 +16,232 @@
 # You should have received a copy of the GNU General Public License
 # along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
 
+from collections import OrderedDict
+import glob, hashlib, importlib.util, os
+
 import numpy as np
 np.seterr(divide='raise')
 
 from gprMax.constants import floattype, complextype
+from gprMax.exceptions import CmdInputError
 from gprMax.utilities import round_value
 
 
+def distance(v):
+    """Calculates the length of an array of vectors. The dot product of each vector with itself is used, as in np.linalg.norm, so results are identical to calculating the length of each vector in turn.
+        
+    Args:
+        v (array): Vectors, with components in the last dimension.
+        
+    Returns:
+        rr (array): Length of each vector.
+    """
+    
+    return np.sqrt(np.matmul(v[..., np.newaxis, :], v[..., :, np.newaxis])[..., 0, 0])
+
+
+def expand_spectrum(P, Q, n):
+    """Expands part of the spectrum of a real array, as given by a real-to-complex FFT (where the last axis is halved), to the full spectrum using Hermitian symmetry.
+        
+    Args:
+        P (array): Part of the half spectrum to expand.
+        Q (array): Part of the half spectrum at the negated positions of P along any axes that are not included in P, i.e. P itself if P is the whole half spectrum.
+        n (int): Length of the last axis of the full spectrum.
+        
+    Returns:
+        full (array): Full spectrum.
+    """
+    
+    nh = P.shape[-1]
+    full = np.empty(P.shape[:-1] + (n,), dtype=P.dtype)
+    full[..., :nh] = P
+    negated = [(-np.arange(s)) % s for s in Q.shape[:-1]]
+    negated.append(n - np.arange(nh, n))
+    full[..., nh:] = np.conj(Q[np.ix_(*negated)])
+    
+    return full
+
+
+class FFTBackend:
+    """FFTs used to generate fractals. A real-to-complex FFT is used for the forward transform of the (real) random numbers, and a complex-to-complex FFT,
+        overwriting its input where supported, is used for the inverse transform (the spectrum is not Hermitian once the fractal function is applied).
+        pyFFTW and scipy.fft are multi-threaded, numpy.fft is single-threaded.
+    """
+    
+    # Backends in order of preference, and the modules that provide them
+    backends = OrderedDict([('pyfftw', 'pyfftw'), ('scipy', 'scipy.fft'), ('numpy', 'numpy.fft')])
+    
+    def __init__(self, name='auto'):
+        """
+        Args:
+            name (str): Name of the backend - 'pyfftw', 'scipy', 'numpy', or 'auto' to use the first of these that is installed.
+        """
+        
+        self.select(name)
+    
+    def select(self, name):
+        """Select the backend.
+            
+        Args:
+            name (str): Name of the backend - 'pyfftw', 'scipy', 'numpy', or 'auto' to use the first of these that is installed.
+        """
+        
+        installed = [x for x in self.backends if importlib.util.find_spec(x) is not None]
+        if name == 'auto':
+            name = installed[0]
+        elif name not in installed:
+            raise CmdInputError('{} has been requested as the FFT backend for fractals but it is not installed'.format(self.backends.get(name, name)))
+        self.name = name
+    
+    def rfftn(self, a, nthreads):
+        """Real-to-complex FFT.
+            
+        Args:
+            a (array): Real input array.
+            nthreads (int): Number of threads to use.
+            
+        Returns:
+            Half spectrum (complex array).
+        """
+        
+        if self.name == 'pyfftw':
+            import pyfftw.interfaces.numpy_fft
+            pyfftw.interfaces.cache.enable()
+            return pyfftw.interfaces.numpy_fft.rfftn(a, threads=nthreads)
+        elif self.name == 'scipy':
+            import scipy.fft
+            return scipy.fft.rfftn(a, workers=nthreads)
+        else:
+            return np.fft.rfftn(a)
+    
+    def ifftn(self, a, nthreads):
+        """Complex-to-complex inverse FFT. The input array may be overwritten.
+            
+        Args:
+            a (array): Complex input array.
+            nthreads (int): Number of threads to use.
+            
+        Returns:
+            Inverse transform (complex array).
+        """
+        
+        if self.name == 'pyfftw':
+            import pyfftw.interfaces.numpy_fft
+            return pyfftw.interfaces.numpy_fft.ifftn(a, overwrite_input=True, threads=nthreads)
+        elif self.name == 'scipy':
+            import scipy.fft
+            return scipy.fft.ifftn(a, overwrite_x=True, workers=nthreads)
+        else:
+            return np.fft.ifftn(a)
+
+
+# FFT backend shared by all fractal volumes and surfaces
+fftbackend = FFTBackend()
+
+
+class FractalCache:
+    """Content-addressed cache of generated fractal arrays. Arrays are kept in memory across model runs in the same process, and optionally
+        stored as .npy files in a cache directory. The least recently used arrays are evicted when the size of the cache exceeds a limit.
+    """
+    
+    def __init__(self, maxsize=1024**3, directory=None):
+        """
+        Args:
+            maxsize (int): Maximum size (bytes) of the arrays held in memory, and of the arrays stored in the cache directory.
+            directory (str): Name of cache directory to store arrays in, or None to only hold arrays in memory.
+        """
+        
+        self.maxsize = maxsize
+        self.directory = directory
+        self.arrays = OrderedDict()
+        self.size = 0
+    
+    @staticmethod
+    def key(*params):
+        """Generate a key from the parameters that determine the contents of a fractal array.
+            
+        Args:
+            params: Parameters, e.g. type of fractal, array dimensions, fractal dimension, weighting, number of bins, and seed.
+            
+        Returns:
+            key (str): Hash of the parameters.
+        """
+        
+        return hashlib.sha1(repr(params).encode()).hexdigest()
+    
+    def get(self, key):
+        """Get a copy of an array from the cache.
+            
+        Args:
+            key (str): Key of the array.
+            
+        Returns:
+            array (array): Copy of the array, or None if it is not in the cache.
+        """
+        
+        if key in self.arrays:
+            self.arrays.move_to_end(key)
+            return self.arrays[key].copy()
+        
+        if self.directory:
+            filename = os.path.join(self.directory, key + '.npy')
+            if os.path.isfile(filename):
+                array = np.load(filename)
+                # Mark file as recently used
+                os.utime(filename)
+                self.store(key, array)
+                return array.copy()
+
+        return None
+    
+    def put(self, key, array):
+        """Put a copy of an array in the cache.
+            
+        Args:
+            key (str): Key of the array.
+            array (array): Array to be cached.
+        """
+        
+        self.store(key, array.copy())
+        
+        if self.directory and array.nbytes <= self.maxsize:
+            os.makedirs(self.directory, exist_ok=True)
+            filename = os.path.join(self.directory, key + '.npy')
+            # Write to a temporary file first so other processes never read a partially written file
+            tmpfile = filename + '.' + str(os.getpid()) + '.tmp'
+            with open(tmpfile, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmpfile, filename)
+            
+            # Evict least recently used files
+            files = sorted(glob.glob(os.path.join(self.directory, '*.npy')), key=os.path.getmtime)
+            size = sum(os.path.getsize(x) for x in files)
+            while size > self.maxsize and files:
+                size -= os.path.getsize(files[0])
+                os.remove(files.pop(0))
+    
+    def store(self, key, array):
+        """Hold an array in memory, evicting least recently used arrays if the size of the cache exceeds its limit.
+            
+        Args:
+            key (str): Key of the array.
+            array (array): Array to be held.
+        """
+        
+        if array.nbytes > self.maxsize:
+            return
+        if key in self.arrays:
+            self.size -= self.arrays.pop(key).nbytes
+        self.arrays[key] = array
+        self.size += array.nbytes
+        while self.size > self.maxsize:
+            self.size -= self.arrays.popitem(last=False)[1].nbytes
+
+
+# Cache of fractal arrays shared by all fractal volumes and surfaces
+fractalcache = FractalCache()
+
+
 class FractalSurface:
     """Fractal surfaces."""
     
@@ -72,39 +291,42 @@ class FractalSurface:
             surfacedims = (self.nx + 1, self.ny + 1)
             d = G.dz
 
-        self.fractalsurface = np.zeros(surfacedims, dtype=complextype)
-        
+        # Fractals are only cached when they are seeded, otherwise they are different every time
+        if self.seed is not None:
+            key = fractalcache.key('surface', surfacedims, self.dimension, self.weighting, self.fractalrange, self.seed, fftbackend.name)
+            self.fractalsurface = fractalcache.get(key)
+            if self.fractalsurface is not None:
+                return
+
         # Positional vector at centre of array, scaled by weighting
         v1 = np.array([self.weighting[0]*(surfacedims[0])/2, self.weighting[1]*(surfacedims[1])/2])
         
         # 2D array of random numbers to be convolved with the fractal function
         R = np.random.RandomState(self.seed)
-        A = R.randn(surfacedims[0], surfacedims[1])
         
         # 2D FFT
-        A = np.fft.fftn(A)
-
-        for i in range(surfacedims[0]):
-            for j in range(surfacedims[1]):
-                # Positional vector for current position
-                v2 = np.array([self.weighting[0]*i, self.weighting[1]*j])
-                rr = np.linalg.norm(v2 - v1)
-                try:
-                    self.fractalsurface[i, j] = A[i, j] * 1/(rr**self.b)
-                except FloatingPointError:
-                    rr = 0.9
-                    self.fractalsurface[i, j] = A[i, j] * 1/(rr**self.b)
+        A = fftbackend.rfftn(R.randn(surfacedims[0], surfacedims[1]), G.nthreads)
+        A = expand_spectrum(A, A, surfacedims[1])
+
+        # Positional vectors for every position, relative to the centre
+        v2 = np.stack(np.meshgrid(self.weighting[0] * np.arange(surfacedims[0]), self.weighting[1] * np.arange(surfacedims[1]), indexing='ij'), axis=-1) - v1
+        rr = distance(v2)
+        # Avoid the singularity at the centre
+        rr[rr == 0] = 0.9
 
         # Shift the zero frequency component to the centre of the spectrum
-        self.fractalsurface = np.fft.ifftshift(self.fractalsurface)
+        self.fractalsurface = np.fft.ifftshift(A / np.float_power(rr, self.b)).astype(complextype)
         # Take the real part (numerical errors can give rise to an imaginary part) of the IFFT
-        self.fractalsurface = np.real(np.fft.ifftn(self.fractalsurface))
+        self.fractalsurface = np.real(fftbackend.ifftn(self.fractalsurface, G.nthreads))
         # Scale the fractal volume according to requested range
         fractalmin = np.amin(self.fractalsurface)
         fractalmax = np.amax(self.fractalsurface)
         fractalrange = fractalmax - fractalmin
         self.fractalsurface = self.fractalsurface * ((self.fractalrange[1] - self.fractalrange[0])/fractalrange) + self.fractalrange[0] - ((self.fractalrange[1] - self.fractalrange[0])/fractalrange) * fractalmin
 
+        if self.seed is not None:
+            fractalcache.put(key, self.fractalsurface)
+
 
 class FractalVolume:
     """Fractal volumes."""
@@ -142,6 +364,13 @@ class FractalVolume:
             G (class): Grid class instance - holds essential parameters describing the model.
         """
         
+        # Fractals are only cached when they are seeded, otherwise they are different every time
+        if self.seed is not None:
+            key = fractalcache.key('volume', (self.nx + 1, self.ny + 1, self.nz + 1), self.dimension, self.weighting, self.nbins, self.seed, fftbackend.name)
+            self.fractalvolume = fractalcache.get(key)
+            if self.fractalvolume is not None:
+                return
+
         self.fractalvolume = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
         
         # Positional vector at centre of array, scaled by weighting
@@ -149,32 +378,32 @@ class FractalVolume:
         
         # 3D array of random numbers to be convolved with the fractal function
         R = np.random.RandomState(self.seed)
-        A = R.randn(self.nx + 1, self.ny + 1, self.nz + 1)
         
-        # 3D FFT
-        A = np.fft.fftn(A)
+        # 3D FFT (half spectrum)
+        A = fftbackend.rfftn(R.randn(self.nx + 1, self.ny + 1, self.nz + 1), G.nthreads)
         
+        # Positional vectors for every position in a yz plane, relative to the centre in y and z
+        vjk = np.stack(np.meshgrid(self.weighting[1] * np.arange(self.ny + 1), self.weighting[2] * np.arange(self.nz + 1), indexing='ij'), axis=-1) - v1[1:]
+        v2 = np.empty((self.ny + 1, self.nz + 1, 3))
+        v2[:, :, 1:] = vjk
         for i in range(self.nx + 1):
-            for j in range(self.ny + 1):
-                for k in range(self.nz + 1):
-                    # Positional vector for current position
-                    v2 = np.array([self.weighting[0]*i, self.weighting[1]*j, self.weighting[2]*k])
-                    rr = np.linalg.norm(v2 - v1)
-                    try:
-                        self.fractalvolume[i, j, k] = A[i, j, k] * 1/(rr**self.b)
-                    except FloatingPointError:
-                        rr = 0.9
-                        self.fractalvolume[i, j, k] = A[i, j, k] * 1/(rr**self.b)
+            v2[:, :, 0] = self.weighting[0] * i - v1[0]
+            rr = distance(v2)
+            # Avoid the singularity at the centre
+            rr[rr == 0] = 0.9
+            # Shift the zero frequency component to the centre of the spectrum, i.e. store plane in its shifted position
+            plane = expand_spectrum(A[i, :, :], A[-i % (self.nx + 1), :, :], self.nz + 1) / np.float_power(rr, self.b)
+            self.fractalvolume[(i - (self.nx + 1) // 2) % (self.nx + 1), :, :] = np.fft.ifftshift(plane)
+        del A
     
-        # Shift the zero frequency component to the centre of the spectrum
-        self.fractalvolume = np.fft.ifftshift(self.fractalvolume)
         # Take the real part (numerical errors can give rise to an imaginary part) of the IFFT
-        self.fractalvolume = np.real(np.fft.ifftn(self.fractalvolume))
+        self.fractalvolume = np.real(fftbackend.ifftn(self.fractalvolume, G.nthreads))
         # Bin fractal values
         bins = np.linspace(np.amin(self.fractalvolume), np.amax(self.fractalvolume), self.nbins + 1)
-        for j in range(self.ny + 1):
-            for k in range(self.nz + 1):
-                self.fractalvolume[:, j, k] = np.digitize(self.fractalvolume[:, j, k], bins, right=True)
+        self.fractalvolume[:] = np.digitize(self.fractalvolume, bins, right=True)
+
+        if self.seed is not None:
+            fractalcache.put(key, self.fractalvolume)
 
     def generate_volume_mask(self):
         """Generate a 3D volume to use as a mask for adding rough surfaces, water and grass/roots. Zero signifies the mask is not set, one signifies the mask is set."""
@@ -25,23 +25,30 @@ versionname = ' (Bowmore)'
 import argparse, datetime, importlib, itertools, os, psutil, sys
 from time import perf_counter
 from copy import deepcopy
-from enum import Enum
 from collections import OrderedDict
 
+import h5py
 import numpy as np
 
+from gprMax.checkpoint import write_checkpoint, read_checkpoint, initial_solver_state, reset_solver_state
 from gprMax.constants import c, e0, m0, z0, floattype
+from gprMax.decomposition import SlabDecomposition
 from gprMax.exceptions import CmdInputError
 from gprMax.fields_update import *
+from gprMax.fractals import fractalcache, fftbackend
 from gprMax.grid import FDTDGrid
 from gprMax.input_cmds_geometry import process_geometrycmds
 from gprMax.input_cmds_file import python_code_blocks, write_python_processed, check_cmd_names
 from gprMax.input_cmds_multiuse import process_multicmds
 from gprMax.input_cmds_singleuse import process_singlecmds
 from gprMax.materials import Material
-from gprMax.output import prepare_output_file, write_output
+from gprMax.output import prepare_output_file, OutputBuffer
 from gprMax.pml_call_updates import update_electric_pml, update_magnetic_pml
 from gprMax.pml import build_pml, calculate_initial_pml_params
+from gprMax.sources import PackedSources
+from gprMax.scheduler import run_task_farm
+from gprMax.temporal_blocking import update_block
+from gprMax.tiling import autotune_tile_size
 from gprMax.utilities import update_progress, logo, human_size
 from gprMax.yee_cell_build import build_ex_component, build_ey_component, build_ez_component, build_hx_component, build_hy_component, build_hz_component
 
@@ -57,9 +64,27 @@ def main():
     parser.add_argument('inputfile', help='path to and name of inputfile')
     parser.add_argument('-n', default=1, type=int, help='number of times to run the input file')
     parser.add_argument('-mpi', action='store_true', default=False, help='switch on MPI')
+    parser.add_argument('--mpi-pin', default='none', choices=['none', 'cores', 'numa'], help='pin MPI workers to a share of the CPU cores, or to a NUMA node, of their node')
+    parser.add_argument('--mpi-retries', default=1, type=int, metavar='N', help='number of times to re-queue a model run that fails on an MPI worker')
+    parser.add_argument('--mpi-timings', metavar='FILE', help='CSV file to write a table of timings for model runs with MPI to; timings already in the file are used to hand out model runs longest first')
+    parser.add_argument('--workers', default=1, type=int, metavar='N', help='number of worker processes to run models in parallel on a single node without MPI (OpenMP threads are split amongst workers)')
     parser.add_argument('--geometry-only', action='store_true', default=False, help='only build model and produce geometry file(s)')
     parser.add_argument('--write-python', action='store_true', default=False, help='write an input file after any Python code blocks in the original input file have been processed')
     parser.add_argument('--opt-taguchi', action='store_true', default=False, help='optimise parameters using the Taguchi optimisation method')
+    parser.add_argument('--fused-updates', action='store_true', default=False, help='update all electric (and all magnetic) field components with a single fused kernel')
+    parser.add_argument('--tiled-updates', action='store_true', default=False, help='update field components by walking the grid in cache-sized tiles (tile size is auto-tuned unless given with --tile-size)')
+    parser.add_argument('--tile-size', nargs=2, type=int, metavar=('J', 'K'), help='size of tiles in cells in the y and z directions for tiled field updates')
+    parser.add_argument('--omp-schedule', default='static', choices=['static', 'dynamic', 'guided'], help='OpenMP schedule used to distribute tiles amongst threads for tiled field updates')
+    parser.add_argument('--temporal-blocking', default=0, type=int, metavar='N', help='carry out N iterations at a time on slabs of the grid (temporal blocking) to reduce memory traffic')
+    parser.add_argument('--temporal-block-width', default=4, type=int, metavar='W', help='width in cells of the slabs used with temporal blocking')
+    parser.add_argument('--build-once', action='store_true', default=False, help='build the model once and reuse it for model runs where only the positions of sources and receivers are stepped, e.g. B-scans')
+    parser.add_argument('--sparse-dispersive', action='store_true', default=False, help='store and update the state of dispersive materials only for the electric field components with dispersive materials')
+    parser.add_argument('--memory-lean', action='store_true', default=False, help='release arrays only used to build the model once any geometry views have been written')
+    parser.add_argument('--fractal-cache-dir', metavar='DIR', help='directory to store generated fractal volumes and surfaces in, so they can be reused by later model runs')
+    parser.add_argument('--fractal-cache-size', default=1024, type=int, metavar='MB', help='maximum size (MB) of the cache of generated fractal volumes and surfaces')
+    parser.add_argument('--fft-backend', default='auto', choices=['auto', 'pyfftw', 'scipy', 'numpy'], help='library used for the FFTs that generate fractal volumes and surfaces')
+    parser.add_argument('--checkpoint-every', default=0, type=int, metavar='N', help='write a checkpoint file of the state of the solver every N iterations')
+    parser.add_argument('--restart', action='store_true', default=False, help='resume model run(s) from checkpoint file(s) if they exist')
     args = parser.parse_args()
     numbermodelruns = args.n
     inputdirectory = os.path.dirname(os.path.abspath(args.inputfile)) + os.sep
@@ -71,6 +96,23 @@ def main():
     
     if args.opt_taguchi and numbermodelruns > 1:
         raise CmdInputError('When a Taguchi optimisation is being carried out the number of model runs argument is not required')
+    if args.workers < 1:
+        raise CmdInputError('The number of worker processes should be at least one')
+    if args.mpi_retries < 0:
+        raise CmdInputError('The number of times to re-queue a failed model run should not be less than zero')
+    if args.mpi and args.workers > 1:
+        raise CmdInputError('Worker processes cannot be used with MPI')
+    if args.checkpoint_every < 0:
+        raise CmdInputError('The number of iterations between checkpoints should not be less than zero')
+    if args.temporal_blocking < 0 or args.temporal_block_width < 1:
+        raise CmdInputError('The number of iterations and width of slabs for temporal blocking should be at least one')
+    if args.tile_size and min(args.tile_size) < 1:
+        raise CmdInputError('The tile size for tiled field updates should be at least one cell')
+    if args.fractal_cache_size < 0:
+        raise CmdInputError('The size of the fractal cache should not be less than zero')
+    fractalcache.maxsize = args.fractal_cache_size * 1024**2
+    fractalcache.directory = args.fractal_cache_dir
+    fftbackend.select(args.fft_backend)
 
     ########################################
     #   Process for Taguchi optimisation   #
@@ -126,76 +168,27 @@ def main():
             # Set parameter ranges and define experiments
             optparams, levels, levelsdiff = calculate_ranges_experiments(optparams, optparamsinit, levels, levelsopt, levelsdiff, OA, N, k, s, i)
     
+            # Add specific value for each parameter to optimise, for each experiment to user accessible namespace
+            optnamespaces = []
+            for modelrun in range(1, numbermodelruns + 1):
+                optnamespace = usernamespace.copy()
+                tmp = {}
+                tmp.update((key, value[modelrun - 1]) for key, value in optparams.items())
+                optnamespace.update({'optparams': tmp})
+                optnamespaces.append(optnamespace)
+
             # Mixed mode MPI/OpenMP - task farm for model runs with MPI; each model parallelised with OpenMP
-            if args.mpi:        
-                from mpi4py import MPI
-
-                # Define MPI message tags
-                tags = Enum('tags', {'READY': 0, 'DONE': 1, 'EXIT': 2, 'START': 3})
-
-                # Initializations and preliminaries
-                comm = MPI.COMM_WORLD   # get MPI communicator object
-                size = comm.size        # total number of processes
-                rank = comm.rank        # rank of this process
-                status = MPI.Status()   # get MPI status object
-                name = MPI.Get_processor_name()     # get name of processor/host
-
-                if rank == 0:
-                    # Master process
-                    modelrun = 1
-                    numworkers = size - 1
-                    closedworkers = 0
-                    print('Master: PID {} on {} using {} workers.'.format(os.getpid(), name, numworkers))
-                    while closedworkers < numworkers:
-                        data = comm.recv(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=status)
-                        source = status.Get_source()
-                        tag = status.Get_tag()
-                        if tag == tags.READY.value:
-                            # Worker is ready, so send it a task
-                            if modelrun < numbermodelruns + 1:
-                                comm.send(modelrun, dest=source, tag=tags.START.value)
-                                print('Master: sending model {} to worker {}.'.format(modelrun, source))
-                                modelrun += 1
-                            else:
-                                comm.send(None, dest=source, tag=tags.EXIT.value)
-                        elif tag == tags.DONE.value:
-                            print('Worker {}: completed.'.format(source))
-                        elif tag == tags.EXIT.value:
-                            print('Worker {}: exited.'.format(source))
-                            closedworkers += 1
-                else:
-                    # Worker process
-                    print('Worker {}: PID {} on {} requesting {} OpenMP threads.'.format(rank, os.getpid(), name, os.environ.get('OMP_NUM_THREADS')))
-                    while True:
-                        comm.send(None, dest=0, tag=tags.READY.value)
-                        # Receive a model number to run from the master
-                        modelrun = comm.recv(source=0, tag=MPI.ANY_TAG, status=status)
-                        tag = status.Get_tag()
-                        
-                        if tag == tags.START.value:
-                            # Run a model
-                            # Add specific value for each parameter to optimise for each experiment to user accessible namespace
-                            optnamespace = usernamespace.copy()
-                            tmp = {}
-                            tmp.update((key, value[modelrun - 1]) for key, value in optparams.items())
-                            optnamespace.update({'optparams': tmp})
-                            run_model(args, modelrun, numbermodelruns, inputfile, usernamespace)
-                            comm.send(None, dest=0, tag=tags.DONE.value)
-                        elif tag == tags.EXIT.value:
-                            break
-
-                    comm.send(None, dest=0, tag=tags.EXIT.value)
-
-            # Standard behaviour - models run serially; each model parallelised with OpenMP
+            if args.mpi:
+                run_task_farm(run_model, args, numbermodelruns, inputfile, optnamespaces)
+
+            # Standard behaviour - models run serially, or farmed out to a pool of worker processes; each model parallelised with OpenMP
             else:
                 tsimstart = perf_counter()
-                for modelrun in range(1, numbermodelruns + 1):
-                    # Add specific value for each parameter to optimise, for each experiment to user accessible namespace
-                    optnamespace = usernamespace.copy()
-                    tmp = {}
-                    tmp.update((key, value[modelrun - 1]) for key, value in optparams.items())
-                    optnamespace.update({'optparams': tmp})
-                    run_model(args, modelrun, numbermodelruns, inputfile, optnamespace)
+                if args.workers > 1:
+                    run_model_pool(args, numbermodelruns, inputfile, optnamespaces)
+                else:
+                    for modelrun in range(1, numbermodelruns + 1):
+                        run_model(args, modelrun, numbermodelruns, inputfile, optnamespaces[modelrun - 1])
                 tsimend = perf_counter()
                 print('\nTotal simulation time [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=int(tsimend - tsimstart))))
 
@@ -261,63 +254,28 @@ def main():
     #   Process for standard simulation   #
     #######################################
     else:
+        # Mixed mode MPI/OpenMP - domain decomposition of a single model amongst MPI processes; each slab of the model parallelised with OpenMP
         if args.mpi and numbermodelruns == 1:
-            raise CmdInputError('MPI is not beneficial when there is only one model to run')
+            from mpi4py import MPI
+            comm = MPI.COMM_WORLD
+            # Only the process with rank 0 reports progress
+            if comm.rank != 0:
+                sys.stdout = open(os.devnull, 'w')
+            tsimstart = perf_counter()
+            run_model(args, 1, numbermodelruns, inputfile, usernamespace, comm)
+            tsimend = perf_counter()
+            print('\nTotal simulation time [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=int(tsimend - tsimstart))))
 
         # Mixed mode MPI/OpenMP - task farm for model runs with MPI; each model parallelised with OpenMP
-        if args.mpi:
-            from mpi4py import MPI
+        elif args.mpi:
+            run_task_farm(run_model, args, numbermodelruns, inputfile, [usernamespace] * numbermodelruns)
 
-            # Define MPI message tags
-            tags = Enum('tags', {'READY': 0, 'DONE': 1, 'EXIT': 2, 'START': 3})
-
-            # Initializations and preliminaries
-            comm = MPI.COMM_WORLD   # get MPI communicator object
-            size = comm.size        # total number of processes
-            rank = comm.rank        # rank of this process
-            status = MPI.Status()   # get MPI status object
-            name = MPI.Get_processor_name()     # get name of processor/host
-
-            if rank == 0:
-                # Master process
-                modelrun = 1
-                numworkers = size - 1
-                closedworkers = 0
-                print('Master: PID {} on {} using {} workers.'.format(os.getpid(), name, numworkers))
-                while closedworkers < numworkers:
-                    data = comm.recv(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=status)
-                    source = status.Get_source()
-                    tag = status.Get_tag()
-                    if tag == tags.READY.value:
-                        # Worker is ready, so send it a task
-                        if modelrun < numbermodelruns + 1:
-                            comm.send(modelrun, dest=source, tag=tags.START.value)
-                            print('Master: sending model {} to worker {}.'.format(modelrun, source))
-                            modelrun += 1
-                        else:
-                            comm.send(None, dest=source, tag=tags.EXIT.value)
-                    elif tag == tags.DONE.value:
-                        print('Worker {}: completed.'.format(source))
-                    elif tag == tags.EXIT.value:
-                        print('Worker {}: exited.'.format(source))
-                        closedworkers += 1
-            else:
-                # Worker process
-                print('Worker {}: PID {} on {} requesting {} OpenMP threads.'.format(rank, os.getpid(), name, os.environ.get('OMP_NUM_THREADS')))
-                while True:
-                    comm.send(None, dest=0, tag=tags.READY.value)
-                    # Receive a model number to run from the master
-                    modelrun = comm.recv(source=0, tag=MPI.ANY_TAG, status=status)
-                    tag = status.Get_tag()
-                    
-                    if tag == tags.START.value:
-                        # Run a model
-                        run_model(args, modelrun, numbermodelruns, inputfile, usernamespace)
-                        comm.send(None, dest=0, tag=tags.DONE.value)
-                    elif tag == tags.EXIT.value:
-                        break
-
-                comm.send(None, dest=0, tag=tags.EXIT.value)
+        # Task farm for model runs with a pool of worker processes on a single node; each model parallelised with OpenMP
+        elif args.workers > 1:
+            tsimstart = perf_counter()
+            run_model_pool(args, numbermodelruns, inputfile, [usernamespace] * numbermodelruns)
+            tsimend = perf_counter()
+            print('\nTotal simulation time [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=int(tsimend - tsimstart))))
 
         # Standard behaviour - models run serially; each model parallelised with OpenMP
         else:
@@ -330,7 +288,49 @@ def main():
         print('\nSimulation completed.\n{}\n'.format(68*'*'))
 
 
-def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace):
+def run_model_pool(args, numbermodelruns, inputfile, usernamespaces):
+    """Runs models in a pool of worker processes on a single node, i.e. a task farm without MPI. The OpenMP threads available are split amongst the workers.
+        
+    Args:
+        args (dict): Namespace with command line arguments
+        numbermodelruns (int): Total number of model runs.
+        inputfile (str): Name of the input file to open.
+        usernamespaces (list): Namespace for each model run that can be accessed by user in any Python code blocks in input file.
+    """
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    ompthreads = os.environ.get('OMP_NUM_THREADS')
+    if ompthreads:
+        nthreads = int(ompthreads)
+    else:
+        nthreads = psutil.cpu_count(logical=False)
+    nthreads = max(nthreads // args.workers, 1)
+    print('Task farm: PID {} using {} workers with {} OpenMP threads each.'.format(os.getpid(), args.workers, nthreads))
+    
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=set_omp_threads, initargs=(nthreads,)) as executor:
+        futures = [executor.submit(run_model, args, modelrun, numbermodelruns, inputfile, usernamespaces[modelrun - 1]) for modelrun in range(1, numbermodelruns + 1)]
+        for modelrun, future in enumerate(futures, start=1):
+            # Raises any exception from the model run
+            future.result()
+            print('Model run {} of {}: completed.'.format(modelrun, numbermodelruns))
+
+
+def set_omp_threads(nthreads):
+    """Sets the number of OpenMP threads used by models run in a worker process (unless set in the input file with #num_threads).
+        
+    Args:
+        nthreads (int): Number of OpenMP threads.
+    """
+    
+    os.environ['OMP_NUM_THREADS'] = str(nthreads)
+
+
+# Model built by the last model run, which is reused by later model runs with an unchanged processed input file when building once
+builtmodel = {}
+
+
+def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace, comm=None):
     """Runs a model - processes the input file; builds the Yee cells; calculates update coefficients; runs main FDTD loop.
         
     Args:
@@ -339,11 +339,17 @@ def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace):
         numbermodelruns (int): Total number of model runs.
         inputfile (str): Name of the input file to open.
         usernamespace (dict): Namespace that can be accessed by user in any Python code blocks in input file.
+        comm (object): MPI communicator to decompose the model amongst, i.e. every process in the communicator runs a slab of the model. Default is no decomposition.
+        
+    Returns:
+        timings (dict): Time (seconds) taken to build the model, estimated and actual time taken to solve the model (None if it is not solved).
     """
     
     # Monitor memory usage
     p = psutil.Process()
     
+    timings = {'build': None, 'estimatedruntime': None, 'solve': None}
+    
     print('\n{}\n\nModel input file: {}\n'.format(68*'*', inputfile))
     
     # Add the current model run to namespace that can be accessed by user in any Python code blocks in input file
@@ -357,6 +363,324 @@ def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace):
     if args.write_python:
         write_python_processed(inputfile, modelrun, numbermodelruns, processedlines)
     
+    # Build the model, or reuse the model built by a previous model run if the processed input file is unchanged, i.e. only the positions of sources and receivers are stepped (B-scan)
+    tbuildstart = perf_counter()
+    if args.build_once and builtmodel.get('processedlines') == processedlines:
+        G = builtmodel['G']
+        reset_solver_state(G, builtmodel['initialstate'])
+        for obj, position in builtmodel['positions']:
+            obj.positionx, obj.positiony, obj.positionz = position
+        for snapshot, filename in builtmodel['snapshots']:
+            snapshot.filename = filename
+        print('\nReusing model built by model run {}'.format(builtmodel['modelrun']))
+    else:
+        # Release any previously built model before building a new one
+        builtmodel.clear()
+        G = build_model(args, modelrun, numbermodelruns, processedlines, usernamespace, comm)
+        if args.build_once:
+            builtmodel.update(processedlines=processedlines, G=G, modelrun=modelrun, initialstate=initial_solver_state(G))
+            builtmodel['positions'] = [(obj, (obj.positionx, obj.positiony, obj.positionz)) for obj in itertools.chain(G.hertziandipoles, G.magneticdipoles, G.voltagesources, G.rxs)]
+            builtmodel['snapshots'] = [(snapshot, snapshot.filename) for snapshot in G.snapshots]
+    timings['build'] = perf_counter() - tbuildstart
+    
+    # Run simulation if not doing only geometry
+    if not args.geometry_only:
+        
+        # Output and checkpoint files
+        inputfileparts = os.path.splitext(inputfile)
+        if numbermodelruns == 1:
+            outputfile = inputfileparts[0] + '.out'
+        else:
+            outputfile = inputfileparts[0] + str(modelrun) + '.out'
+        checkpointfile = os.path.splitext(outputfile)[0] + '.chk'
+        
+        if comm:
+            if args.temporal_blocking or args.checkpoint_every or args.restart:
+                raise CmdInputError('Temporal blocking and checkpoints cannot be used with domain decomposition')
+            if G.snapshots:
+                raise CmdInputError('Snapshots cannot be used with domain decomposition')
+
+        # Tile size for tiled field updates, either user supplied or auto-tuned (auto-tuning updates the fields so must be done before restoring any checkpoint)
+        tilesize = None
+        if args.tiled_updates or args.tile_size:
+            set_omp_schedule(args.omp_schedule, 0)
+            if args.tile_size:
+                tilesize = args.tile_size
+            else:
+                tilesize = autotune_tile_size(G)
+            print('\nTiled field updates using tile size (y, z): {} x {} cells, and OpenMP schedule: {}'.format(tilesize[0], tilesize[1], args.omp_schedule))
+
+        # Temporal blocking
+        if args.temporal_blocking:
+            if Material.maxpoles != 0:
+                raise CmdInputError('Temporal blocking cannot be used with dispersive materials')
+            print('\nTemporal blocking using {} iterations per block, and slabs of {} cells in the x direction'.format(args.temporal_blocking, args.temporal_block_width))
+
+        # Sparse dispersive updates (the standard update uses coefficients that leave the field components with dispersive materials unchanged)
+        updatecoeffsE = G.updatecoeffsE
+        if G.sparsedispersive:
+            updatecoeffsE = G.updatecoeffsEsparse
+            print('\nSparse dispersive updates of {} electric field components with dispersive materials'.format(G.Tx.shape[1] + G.Ty.shape[1] + G.Tz.shape[1]))
+
+        # Restore state of solver from any checkpoint file
+        startiteration = 0
+        abstime = 0
+        if args.restart:
+            if os.path.isfile(checkpointfile) and os.path.isfile(outputfile):
+                startiteration, abstime = read_checkpoint(checkpointfile, G)
+                print('\nRestarting from checkpoint file: {} (iteration {})'.format(checkpointfile, startiteration + 1))
+            else:
+                print('\nNo checkpoint file found for restart, starting from beginning: {}'.format(checkpointfile))
+        
+        # Prepare any snapshot files (that have not already been written before a restart)
+        if G.snapshots:
+            for snapshot in G.snapshots:
+                if snapshot.time > startiteration:
+                    snapshot.prepare_file(modelrun, numbermodelruns, G)
+
+        # Prepare output file (or continue writing to existing one if restarting)
+        sys.stdout.write('\nOutput to file: {}\n'.format(outputfile))
+        sys.stdout.flush()
+        if startiteration > 0:
+            f = h5py.File(outputfile, 'r+')
+        elif comm is None or comm.rank == 0:
+            f = prepare_output_file(outputfile, G)
+        else:
+            f = None
+
+        # Adjust position of sources and receivers if required
+        if G.srcstepx > 0 or G.srcstepy > 0 or G.srcstepz > 0:
+            for source in itertools.chain(G.hertziandipoles, G.magneticdipoles, G.voltagesources):
+                source.positionx += (modelrun - 1) * G.srcstepx
+                source.positiony += (modelrun - 1) * G.srcstepy
+                source.positionz += (modelrun - 1) * G.srcstepz
+        if G.rxstepx > 0 or G.rxstepy > 0 or G.rxstepz > 0:
+            for receiver in G.rxs:
+                receiver.positionx += (modelrun - 1) * G.rxstepx
+                receiver.positiony += (modelrun - 1) * G.rxstepy
+                receiver.positionz += (modelrun - 1) * G.rxstepz
+
+        # Decompose the model into slabs (once the output file has been prepared for the whole model), and range of x coordinates of field components updated by the PML
+        pmlxrange = (None, None)
+        if comm:
+            decomposition = SlabDecomposition(comm, G)
+            decomposition.decompose(G)
+            pmlxrange = (decomposition.xs, decomposition.xf)
+            print('\nDomain decomposition into {} slabs in the x direction'.format(comm.size))
+
+        # Sources (except transmission lines) packed into arrays, so each type of source is applied with a single call in the main loop
+        voltagesources = PackedSources(G.voltagesources, G)
+        hertziandipoles = PackedSources(G.hertziandipoles, G)
+        magneticdipoles = PackedSources(G.magneticdipoles, G)
+
+        # Buffer for storing receiver and transmission line outputs during the main loop (outputs for a slab are gathered once the main loop has completed)
+        if comm:
+            slaboutputs = decomposition.output_arrays(G)
+            outputs = OutputBuffer(slaboutputs, G)
+        else:
+            outputs = OutputBuffer(f, G)
+
+        ##################################
+        #   Main FDTD calculation loop   #
+        ##################################
+        tsolvestart = perf_counter()
+
+        # Main loop with temporal blocking, i.e. several iterations are carried out on slabs of the grid at a time
+        if args.temporal_blocking:
+            timestep = startiteration
+            while timestep < G.iterations:
+                # Write any snapshots to file
+                if G.snapshots:
+                    for snapshot in G.snapshots:
+                        if snapshot.time == timestep + 1:
+                            snapshot.write_snapshot(G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+                
+                # Blocks must finish on iterations where snapshots or checkpoints are required, and fit in the output buffer
+                blockend = min(timestep + args.temporal_blocking, G.iterations)
+                for snapshot in G.snapshots:
+                    if snapshot.time - 1 > timestep:
+                        blockend = min(blockend, snapshot.time - 1)
+                if args.checkpoint_every:
+                    blockend = min(blockend, (timestep // args.checkpoint_every + 1) * args.checkpoint_every)
+                blockend = min(blockend, timestep + outputs.nsteps)
+                if outputs.nstored + blockend - timestep > outputs.nsteps:
+                    outputs.flush()
+                
+                abstime = update_block(timestep, blockend - timestep, abstime, args.temporal_block_width, outputs, (voltagesources, hertziandipoles, magneticdipoles), G)
+                
+                # Write checkpoint file
+                if args.checkpoint_every and blockend % args.checkpoint_every == 0 and blockend < G.iterations:
+                    outputs.flush()
+                    f.flush()
+                    write_checkpoint(checkpointfile, blockend, abstime, G)
+                
+                # Calculate time for first block, used to estimate overall runtime
+                if timestep == startiteration:
+                    tstepend = perf_counter()
+                    timings['estimatedruntime'] = (tstepend - tsolvestart) / (blockend - timestep) * (G.iterations - startiteration)
+                    runtime = datetime.timedelta(seconds=int(timings['estimatedruntime']))
+                    sys.stdout.write('Estimated runtime [HH:MM:SS]: {}\n'.format(runtime))
+                    sys.stdout.write('Solving for model run {} of {}...\n'.format(modelrun, numbermodelruns))
+                    sys.stdout.flush()
+                else:
+                    update_progress(blockend / G.iterations)
+                timestep = blockend
+        
+        else:
+            for timestep in range(startiteration, G.iterations):
+                if timestep == startiteration:
+                    tstepstart = perf_counter()
+            
+                # Store field outputs (written to file in bulk)
+                outputs.store_outputs(timestep, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+            
+                # Write any snapshots to file
+                if G.snapshots:
+                    for snapshot in G.snapshots:
+                        if snapshot.time == timestep + 1:
+                            snapshot.write_snapshot(G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+
+                # Update electric field components
+                # If there are any dispersive materials do 1st part of dispersive update. It is split into two parts as it requires present and updated electric field values.
+                if Material.maxpoles == 1 and not G.sparsedispersive:
+                    update_ex_dispersive_1pole_A(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ex, G.Hy, G.Hz)
+                    update_ey_dispersive_1pole_A(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Ty, G.Ey, G.Hx, G.Hz)
+                    update_ez_dispersive_1pole_A(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tz, G.Ez, G.Hx, G.Hy)
+                elif Material.maxpoles > 1 and not G.sparsedispersive:
+                    update_ex_dispersive_multipole_A(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ex, G.Hy, G.Hz)
+                    update_ey_dispersive_multipole_A(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Ty, G.Ey, G.Hx, G.Hz)
+                    update_ez_dispersive_multipole_A(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tz, G.Ez, G.Hx, G.Hy)
+                # Otherwise all materials are non-dispersive (or the sparse dispersive mode is used) so do standard update
+                elif tilesize:
+                    update_electric_tiled(G.nx, G.ny, G.nz, G.nthreads, tilesize[0], tilesize[1], updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                elif args.fused_updates:
+                    update_electric(G.nx, G.ny, G.nz, G.nthreads, updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                else:
+                    update_ex(G.nx, G.ny, G.nz, G.nthreads, updatecoeffsE, G.ID, G.Ex, G.Hy, G.Hz)
+                    update_ey(G.nx, G.ny, G.nz, G.nthreads, updatecoeffsE, G.ID, G.Ey, G.Hx, G.Hz)
+                    update_ez(G.nx, G.ny, G.nz, G.nthreads, updatecoeffsE, G.ID, G.Ez, G.Hx, G.Hy)
+                # In the sparse dispersive mode the standard update leaves the field components with dispersive materials unchanged, and they are updated (1st part of dispersive update) separately
+                if G.sparsedispersive:
+                    update_ex_dispersive_sparse_A(G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.dispersiveruns[0], G.Tx, G.Ex, G.Hy, G.Hz)
+                    update_ey_dispersive_sparse_A(G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.dispersiveruns[1], G.Ty, G.Ey, G.Hx, G.Hz)
+                    update_ez_dispersive_sparse_A(G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.dispersiveruns[2], G.Tz, G.Ez, G.Hx, G.Hy)
+
+                # Update electric field components with the PML correction
+                update_electric_pml(G, *pmlxrange)
+
+                # Update electric field components from sources
+                if len(voltagesources):
+                    voltagesources.update_electric(timestep, G)
+                if G.transmissionlines:
+                    for transmissionline in G.transmissionlines:
+                        transmissionline.update_electric(timestep, G.Ex, G.Ey, G.Ez, G)
+                if len(hertziandipoles):   # Update any Hertzian dipole sources last
+                    hertziandipoles.update_electric(timestep, G)
+
+                # If there are any dispersive materials do 2nd part of dispersive update. It is split into two parts as it requires present and updated electric field values. Therefore it can only be completely updated after the electric field has been updated by the PML and source updates.
+                if G.sparsedispersive:
+                    update_ex_dispersive_sparse_B(G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.dispersiveruns[0], G.Tx, G.Ex)
+                    update_ey_dispersive_sparse_B(G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.dispersiveruns[1], G.Ty, G.Ey)
+                    update_ez_dispersive_sparse_B(G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.dispersiveruns[2], G.Tz, G.Ez)
+                elif Material.maxpoles == 1:
+                    update_ex_dispersive_1pole_B(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ex)
+                    update_ey_dispersive_1pole_B(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsdispersive, G.ID, G.Ty, G.Ey)
+                    update_ez_dispersive_1pole_B(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsdispersive, G.ID, G.Tz, G.Ez)
+                elif Material.maxpoles > 1:
+                    update_ex_dispersive_multipole_B(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ex)
+                    update_ey_dispersive_multipole_B(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.Ty, G.Ey)
+                    update_ez_dispersive_multipole_B(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.Tz, G.Ez)
+
+                # Exchange electric field components on the faces of slabs with neighbouring processes
+                if comm:
+                    decomposition.exchange_electric(G)
+
+                # Increment absolute time value
+                abstime += 0.5 * G.dt
+            
+                # Update magnetic field components
+                if tilesize:
+                    update_magnetic_tiled(G.nx, G.ny, G.nz, G.nthreads, tilesize[0], tilesize[1], G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G.Ex, G.Ey, G.Ez)
+                elif args.fused_updates:
+                    update_magnetic(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G.Ex, G.Ey, G.Ez)
+                else:
+                    update_hx(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Hx, G.Ey, G.Ez)
+                    update_hy(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Hy, G.Ex, G.Ez)
+                    update_hz(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Hz, G.Ex, G.Ey)
+
+                # Update magnetic field components with the PML correction
+                update_magnetic_pml(G, *pmlxrange)
+
+                # Exchange magnetic field components on the faces of slabs with neighbouring processes (transmission lines use those below their position)
+                if comm:
+                    decomposition.exchange_magnetic(G)
+
+                # Update magnetic field components from sources
+                if G.transmissionlines:
+                    for transmissionline in G.transmissionlines:
+                        transmissionline.update_magnetic(timestep, G.Hx, G.Hy, G.Hz, G)
+                if len(magneticdipoles):
+                    magneticdipoles.update_magnetic(timestep, G)
+
+                # Magnetic dipoles may have changed magnetic field components on the faces of slabs so exchange them again
+                if comm and decomposition.magneticdipoles:
+                    decomposition.exchange_magnetic(G)
+        
+                # Increment absolute time value
+                abstime += 0.5 * G.dt
+        
+                # Write checkpoint file (stored outputs are written first so the output file is consistent with the checkpoint)
+                if args.checkpoint_every and (timestep + 1) % args.checkpoint_every == 0 and timestep + 1 < G.iterations:
+                    outputs.flush()
+                    f.flush()
+                    write_checkpoint(checkpointfile, timestep + 1, abstime, G)
+        
+                # Calculate time for two iterations, used to estimate overall runtime
+                if timestep == startiteration + 1:
+                    tstepend = perf_counter()
+                    timings['estimatedruntime'] = (tstepend - tstepstart) / 2 * (G.iterations - startiteration)
+                    runtime = datetime.timedelta(seconds=int(timings['estimatedruntime']))
+                    sys.stdout.write('Estimated runtime [HH:MM:SS]: {}\n'.format(runtime))
+                    sys.stdout.write('Solving for model run {} of {}...\n'.format(modelrun, numbermodelruns))
+                    sys.stdout.flush()
+                elif timestep > startiteration + 1:
+                    update_progress((timestep + 1) / G.iterations)
+            
+        # Write any remaining stored outputs and close output file
+        outputs.flush()
+        if comm:
+            decomposition.gather_outputs(slaboutputs, f)
+        if f:
+            f.close()
+        
+        # Checkpoint file no longer required once model run has completed
+        if os.path.isfile(checkpointfile):
+            os.remove(checkpointfile)
+        tsolveend = perf_counter()
+        print('\n\nSolving took [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=int(tsolveend - tsolvestart))))
+        print('Peak memory (approx) used: {}'.format(human_size(p.memory_info().rss)))
+        if G.pmls:
+            print('Memory used by PML: {}'.format(human_size(sum(pml.memory_usage() for pml in G.pmls))))
+        timings['solve'] = tsolveend - tsolvestart
+
+    return timings
+
+
+def build_model(args, modelrun, numbermodelruns, processedlines, usernamespace, comm=None):
+    """Builds a model - processes the input commands; builds the Yee cells; calculates update coefficients.
+        
+    Args:
+        args (dict): Namespace with command line arguments
+        modelrun (int): Current model run number.
+        numbermodelruns (int): Total number of model runs.
+        processedlines (list): Input commands after any Python code blocks in the input file have been processed.
+        usernamespace (dict): Namespace that can be accessed by user in any Python code blocks in input file.
+        comm (object): MPI communicator the model is decomposed amongst (geometry views are only written by the process with rank 0). Default is no decomposition.
+        
+    Returns:
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+    
     # Check validity of command names & that essential commands are present
     singlecmds, multicmds, geometry = check_cmd_names(processedlines)
 
@@ -402,7 +726,7 @@ def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace):
             if source.resistance != 0:
                 if source.polarisation == 'x':
                     requirednumID = G.ID[0, source.positionx, source.positiony, source.positionz]
-                    material = next(x for x in G.materials if x.numID == requirednumID)
+                    material = G.materials[requirednumID]
                     newmaterial = deepcopy(material)
                     newmaterial.ID = material.ID + '|VoltageSource_' + str(source.resistance)
                     newmaterial.numID = len(G.materials)
@@ -411,7 +735,7 @@ def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace):
                     G.ID[0, source.positionx, source.positiony, source.positionz] = newmaterial.numID
                 elif source.polarisation == 'y':
                     requirednumID = G.ID[1, source.positionx, source.positiony, source.positionz]
-                    material = next(x for x in G.materials if x.numID == requirednumID)
+                    material = G.materials[requirednumID]
                     newmaterial = deepcopy(material)
                     newmaterial.ID = material.ID + '|VoltageSource_' + str(source.resistance)
                     newmaterial.numID = len(G.materials)
@@ -420,7 +744,7 @@ def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace):
                     G.ID[1, source.positionx, source.positiony, source.positionz] = newmaterial.numID
                 elif source.polarisation == 'z':
                     requirednumID = G.ID[2, source.positionx, source.positiony, source.positionz]
-                    material = next(x for x in G.materials if x.numID == requirednumID)
+                    material = G.materials[requirednumID]
                     newmaterial = deepcopy(material)
                     newmaterial.ID = material.ID + '|VoltageSource_' + str(source.resistance)
                     newmaterial.numID = len(G.materials)
@@ -429,8 +753,28 @@ def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace):
                     G.ID[2, source.positionx, source.positiony, source.positionz] = newmaterial.numID
                 G.materials.append(newmaterial)
 
+    # Calculate values of the waveforms of sources for the whole time window, so they only need to be looked up in the main loop
+    for source in itertools.chain(G.voltagesources, G.hertziandipoles, G.magneticdipoles, G.transmissionlines):
+        source.calculate_waveform_values(G)
+
+    # Use the narrowest integer type for the ID array now the materials are known
+    G.compact_ID_array(len(G.materials))
+
+    # Write files for any geometry views
+    if G.geometryviews and (comm is None or comm.rank == 0):
+        tgeostart = perf_counter()
+        for geometryview in G.geometryviews:
+            geometryview.write_file(modelrun, numbermodelruns, G)
+        tgeoend = perf_counter()
+        print('\nGeometry file(s) written in [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=int(tgeoend - tgeostart))))
+
+    # Arrays only used to build the model and write geometry views can now be released
+    if args.memory_lean:
+        G.release_build_arrays()
+
     # Initialise arrays for storing temporary values if there are any dispersive materials
     if Material.maxpoles != 0:
+        G.sparsedispersive = args.sparse_dispersive
         G.initialise_dispersive_arrays(len(G.materials))
     
     # Initialise arrays of update coefficients to pass to update functions
@@ -451,7 +795,9 @@ def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace):
         if Material.maxpoles != 0:
             z = 0
             for y in range(Material.maxpoles):
-                G.updatecoeffsdispersive[x, z:z+3] = e0 * material.eqt2[y], material.eqt[y], material.zt[y]
+                coeffs = np.array([e0 * material.eqt2[y], material.eqt[y], material.zt[y]])
+                # Coefficients of Debye poles are real
+                G.updatecoeffsdispersive[x, z:z+3] = coeffs.real if G.dispersivetype == floattype else coeffs
                 z += 3
         
         if G.messages:
@@ -464,143 +810,8 @@ def run_model(args, modelrun, numbermodelruns, inputfile, usernamespace):
             else:
                 dielectricsmoothing = 'dielectric smoothing not permitted.'
             print('{:3}\t{:12}\tepsr={:g}, sig={:g} S/m; mur={:g}, sig*={:g} S/m; '.format(material.numID, material.ID, material.er, material.se, material.mr, material.sm) + tmp + dielectricsmoothing)
-    
-    # Write files for any geometry views
-    if G.geometryviews:
-        tgeostart = perf_counter()
-        for geometryview in G.geometryviews:
-            geometryview.write_file(modelrun, numbermodelruns, G)
-        tgeoend = perf_counter()
-        print('\nGeometry file(s) written in [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=int(tgeoend - tgeostart))))
-
-    # Run simulation if not doing only geometry
-    if not args.geometry_only:
-        
-        # Prepare any snapshot files
-        if G.snapshots:
-            for snapshot in G.snapshots:
-                snapshot.prepare_file(modelrun, numbermodelruns, G)
-
-        # Prepare output file
-        inputfileparts = os.path.splitext(inputfile)
-        if numbermodelruns == 1:
-            outputfile = inputfileparts[0] + '.out'
-        else:
-            outputfile = inputfileparts[0] + str(modelrun) + '.out'
-        sys.stdout.write('\nOutput to file: {}\n'.format(outputfile))
-        sys.stdout.flush()
-        f = prepare_output_file(outputfile, G)
-
-        # Adjust position of sources and receivers if required
-        if G.srcstepx > 0 or G.srcstepy > 0 or G.srcstepz > 0:
-            for source in itertools.chain(G.hertziandipoles, G.magneticdipoles, G.voltagesources):
-                source.positionx += (modelrun - 1) * G.srcstepx
-                source.positiony += (modelrun - 1) * G.srcstepy
-                source.positionz += (modelrun - 1) * G.srcstepz
-        if G.rxstepx > 0 or G.rxstepy > 0 or G.rxstepz > 0:
-            for receiver in G.rxs:
-                receiver.positionx += (modelrun - 1) * G.rxstepx
-                receiver.positiony += (modelrun - 1) * G.rxstepy
-                receiver.positionz += (modelrun - 1) * G.rxstepz
-
-        ##################################
-        #   Main FDTD calculation loop   #
-        ##################################
-        tsolvestart = perf_counter()
-        # Absolute time
-        abstime = 0
-
-        for timestep in range(G.iterations):
-            if timestep == 0:
-                tstepstart = perf_counter()
-            
-            # Write field outputs to file
-            write_output(f, timestep, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
-            
-            # Write any snapshots to file
-            if G.snapshots:
-                for snapshot in G.snapshots:
-                    if snapshot.time == timestep + 1:
-                        snapshot.write_snapshot(G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
-
-            # Update electric field components
-            # If there are any dispersive materials do 1st part of dispersive update. It is split into two parts as it requires present and updated electric field values.
-            if Material.maxpoles == 1:
-                update_ex_dispersive_1pole_A(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ex, G.Hy, G.Hz)
-                update_ey_dispersive_1pole_A(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Ty, G.Ey, G.Hx, G.Hz)
-                update_ez_dispersive_1pole_A(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tz, G.Ez, G.Hx, G.Hy)
-            elif Material.maxpoles > 1:
-                update_ex_dispersive_multipole_A(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ex, G.Hy, G.Hz)
-                update_ey_dispersive_multipole_A(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Ty, G.Ey, G.Hx, G.Hz)
-                update_ez_dispersive_multipole_A(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tz, G.Ez, G.Hx, G.Hy)
-            # Otherwise all materials are non-dispersive so do standard update
-            else:
-                update_ex(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Hy, G.Hz)
-                update_ey(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ey, G.Hx, G.Hz)
-                update_ez(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ez, G.Hx, G.Hy)
-
-            # Update electric field components with the PML correction
-            update_electric_pml(G)
-
-            # Update electric field components from sources
-            if G.voltagesources:
-                for voltagesource in G.voltagesources:
-                    voltagesource.update_electric(abstime, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
-            if G.transmissionlines:
-                for transmissionline in G.transmissionlines:
-                    transmissionline.update_electric(abstime, G.Ex, G.Ey, G.Ez, G)
-            if G.hertziandipoles:   # Update any Hertzian dipole sources last
-                for hertziandipole in G.hertziandipoles:
-                    hertziandipole.update_electric(abstime, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
-
-            # If there are any dispersive materials do 2nd part of dispersive update. It is split into two parts as it requires present and updated electric field values. Therefore it can only be completely updated after the electric field has been updated by the PML and source updates.
-            if Material.maxpoles == 1:
-                update_ex_dispersive_1pole_B(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ex)
-                update_ey_dispersive_1pole_B(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsdispersive, G.ID, G.Ty, G.Ey)
-                update_ez_dispersive_1pole_B(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsdispersive, G.ID, G.Tz, G.Ez)
-            elif Material.maxpoles > 1:
-                update_ex_dispersive_multipole_B(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ex)
-                update_ey_dispersive_multipole_B(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.Ty, G.Ey)
-                update_ez_dispersive_multipole_B(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.Tz, G.Ez)
-
-            # Increment absolute time value
-            abstime += 0.5 * G.dt
-            
-            # Update magnetic field components
-            update_hx(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Hx, G.Ey, G.Ez)
-            update_hy(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Hy, G.Ex, G.Ez)
-            update_hz(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Hz, G.Ex, G.Ey)
-
-            # Update magnetic field components with the PML correction
-            update_magnetic_pml(G)
-
-            # Update magnetic field components from sources
-            if G.transmissionlines:
-                for transmissionline in G.transmissionlines:
-                    transmissionline.update_magnetic(abstime, G.Hx, G.Hy, G.Hz, G)
-            if G.magneticdipoles:
-                for magneticdipole in G.magneticdipoles:
-                    magneticdipole.update_magnetic(abstime, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G)
-        
-            # Increment absolute time value
-            abstime += 0.5 * G.dt
-        
-            # Calculate time for two iterations, used to estimate overall runtime
-            if timestep == 1:
-                tstepend = perf_counter()
-                runtime = datetime.timedelta(seconds=int((tstepend - tstepstart) / 2 * G.iterations))
-                sys.stdout.write('Estimated runtime [HH:MM:SS]: {}\n'.format(runtime))
-                sys.stdout.write('Solving for model run {} of {}...\n'.format(modelrun, numbermodelruns))
-                sys.stdout.flush()
-            elif timestep > 1:
-                update_progress((timestep + 1) / G.iterations)
-            
-        # Close output file
-        f.close()
-        tsolveend = perf_counter()
-        print('\n\nSolving took [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=int(tsolveend - tsolvestart))))
-        print('Peak memory (approx) used: {}'.format(human_size(p.memory_info().rss)))
-
-
 
+    if G.sparsedispersive:
+        G.initialise_sparse_updatecoeff_arrays()
 
+    return G
@@ -43,6 +43,7 @@ class FDTDGrid:
         self.pmlthickness = (10, 10, 10, 10, 10, 10)
         self.pmls = []
         self.materials = []
+        self.averagedmaterials = {} # Numeric IDs of averaged materials keyed by the sorted numeric IDs of their constituents
         self.mixingmodels = []
         self.averagevolumeobjects = True
         self.fractalvolumes = []
@@ -61,6 +62,8 @@ class FDTDGrid:
         self.rxstepz = 0
         self.rxs = []
         self.snapshots = []
+        self.sparsedispersive = False
+        self.dispersivetype = complextype
         
     def initialise_std_arrays(self):
         """Initialise an array for volumetric material IDs (solid); boolean arrays for specifying whether materials can have dielectric smoothing (rigid);
@@ -68,8 +71,8 @@ class FDTDGrid:
             to allow dielectric smoothing (zero).
         """
         self.solid = np.ones((self.nx + 1, self.ny + 1, self.nz + 1), dtype=np.uint32)
-        self.rigidE = np.zeros((12, self.nx + 1, self.ny + 1, self.nz + 1), dtype=np.int8)
-        self.rigidH = np.zeros((6, self.nx + 1, self.ny + 1, self.nz + 1), dtype=np.int8)
+        self.rigidE = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=np.uint16)
+        self.rigidH = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=np.uint8)
         self.ID = np.ones((6, self.nx + 1, self.ny + 1, self.nz + 1), dtype=np.uint32)
         self.Ex = np.zeros((self.nx, self.ny + 1, self.nz + 1), dtype=floattype)
         self.Ey = np.zeros((self.nx + 1, self.ny, self.nz + 1), dtype=floattype)
@@ -78,6 +81,39 @@ class FDTDGrid:
         self.Hy = np.zeros((self.nx, self.ny + 1, self.nz), dtype=floattype)
         self.Hz = np.zeros((self.nx, self.ny, self.nz + 1), dtype=floattype)
     
+    def release_build_arrays(self):
+        """Release the arrays for volumetric material IDs (solid), for specifying whether materials can have dielectric smoothing (rigid), and of any fractal volumes.
+            These are only required to build the model and write geometry views, and are not used by the solver.
+        """
+        self.fractalvolumes = []
+        self.solid = None
+        self.rigidE = None
+        self.rigidH = None
+
+    def compact_ID_array(self, nummaterials):
+        """Convert the array of cell edge IDs (ID) to the narrowest unsigned integer type that can index all the materials in the model.
+            Must be called once the list of materials is final, i.e. after the model has been built.
+            
+        Args:
+            nummaterials (int): Number of materials present in the model.
+        """
+        for dtype in (np.uint8, np.uint16, np.uint32):
+            if nummaterials - 1 <= np.iinfo(dtype).max:
+                break
+        if self.ID.dtype != dtype:
+            self.ID = self.ID.astype(dtype)
+
+    def material_property_array(self, attribute):
+        """Create an array of a property of the materials indexed by their numeric IDs, e.g. for looking up the property of the materials in (slices of) the solid array.
+            
+        Args:
+            attribute (str): Name of the property of the materials, e.g. 'er'.
+            
+        Returns:
+            values (array): Values of the property for each material.
+        """
+        return np.array([getattr(material, attribute) for material in self.materials])
+
     def initialise_std_updatecoeff_arrays(self, nummaterials):
         """Initialise arrays for storing update coefficients.
             
@@ -88,16 +124,53 @@ class FDTDGrid:
         self.updatecoeffsH = np.zeros((nummaterials, 5), dtype=floattype)
 
     def initialise_dispersive_arrays(self, nummaterials):
-        """Initialise arrays for storing coefficients when there are dispersive materials present.
+        """Initialise arrays for storing coefficients when there are dispersive materials present. The coefficients and temporary values are
+            real (floattype) if all the dispersive materials are Debye, otherwise complex (complextype).
             
         Args:
             nummaterials (int): Number of materials present in the model.
         """
-        self.Tx = np.zeros((Material.maxpoles, self.nx, self.ny + 1, self.nz + 1), dtype=complextype)
-        self.Ty = np.zeros((Material.maxpoles, self.nx + 1, self.ny, self.nz + 1), dtype=complextype)
-        self.Tz = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz), dtype=complextype)
-        self.updatecoeffsdispersive = np.zeros((nummaterials, 3 * Material.maxpoles), dtype=complextype)
+        if all(material.type == 'debye' for material in self.materials if material.poles > 0):
+            self.dispersivetype = floattype
+        else:
+            self.dispersivetype = complextype
+        self.initialise_temporary_arrays()
+        self.updatecoeffsdispersive = np.zeros((nummaterials, 3 * Material.maxpoles), dtype=self.dispersivetype)
+
+    def initialise_temporary_arrays(self):
+        """Initialise arrays for storing temporary values for dispersive materials. In the sparse dispersive mode the values are only stored for
+            the electric field components (in the range updated) with dispersive materials, which are listed as runs of consecutive field components
+            in the z direction (x, y, first and last (+1) z coordinates, and index of the first field component in the temporary array) in dispersiveruns.
+            Must be called once the ID array is final.
+        """
+        if self.sparsedispersive:
+            dispersive = self.material_property_array('poles') > 0
+            self.dispersiveruns = []
+            # Coordinates of the first of each electric field component that is updated (those on the faces of the grid tangential to them are not)
+            for component, start in enumerate(((0, 1, 1), (1, 0, 1), (1, 1, 0))):
+                cells = dispersive[self.ID[component, start[0]:self.nx, start[1]:self.ny, start[2]:self.nz]]
+                edges = np.diff(np.pad(cells, ((0, 0), (0, 0), (1, 1))).astype(np.int8), axis=2)
+                i, j, kstart = np.nonzero(edges == 1)
+                kfinish = np.nonzero(edges == -1)[2]
+                runs = np.empty((len(i), 5), dtype=np.intp)
+                runs[:, 0] = i + start[0]
+                runs[:, 1] = j + start[1]
+                runs[:, 2] = kstart + start[2]
+                runs[:, 3] = kfinish + start[2]
+                runs[:, 4] = np.cumsum(kfinish - kstart) - (kfinish - kstart)
+                self.dispersiveruns.append(runs)
+            self.Tx, self.Ty, self.Tz = (np.zeros((Material.maxpoles, np.sum(runs[:, 3] - runs[:, 2])), dtype=self.dispersivetype) for runs in self.dispersiveruns)
+        else:
+            self.Tx = np.zeros((Material.maxpoles, self.nx, self.ny + 1, self.nz + 1), dtype=self.dispersivetype)
+            self.Ty = np.zeros((Material.maxpoles, self.nx + 1, self.ny, self.nz + 1), dtype=self.dispersivetype)
+            self.Tz = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz), dtype=self.dispersivetype)
 
+    def initialise_sparse_updatecoeff_arrays(self):
+        """Initialise electric update coefficients for the standard update in the sparse dispersive mode, which leave the field components with
+            dispersive materials unchanged (they are updated separately). Must be called once the update coefficients have been calculated.
+        """
+        self.updatecoeffsEsparse = self.updatecoeffsE.copy()
+        self.updatecoeffsEsparse[self.material_property_array('poles') > 0, 0:4] = 1, 0, 0, 0
 
 def Ix(x, y, z, Hy, Hz, G):
     """Calculates the x-component of current at a grid position.
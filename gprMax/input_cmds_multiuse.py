@@ -110,8 +110,7 @@ def process_multicmds(multicmds, G):
                 if stop - start <= 0:
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' duration of the source should not be zero or less')
                 v.start = start
-                if stop > G.timewindow:
-                    v.stop = G.timewindow
+                v.stop = min(stop, G.timewindow)
                 startstop = ' start time {:g} secs, finish time {:g} secs '.format(v.start, v.stop)
             else:
                 v.start = 0
@@ -169,8 +168,7 @@ def process_multicmds(multicmds, G):
                 if stop - start <= 0:
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' duration of the source should not be zero or less')
                 h.start = start
-                if stop > G.timewindow:
-                    h.stop = G.timewindow
+                h.stop = min(stop, G.timewindow)
                 startstop = ' start time {:g} secs, finish time {:g} secs '.format(h.start, h.stop)
             else:
                 h.start = 0
@@ -228,8 +226,7 @@ def process_multicmds(multicmds, G):
                 if stop - start <= 0:
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' duration of the source should not be zero or less')
                 m.start = start
-                if stop > G.timewindow:
-                    m.stop = G.timewindow
+                m.stop = min(stop, G.timewindow)
                 startstop = ' start time {:g} secs, finish time {:g} secs '.format(m.start, m.stop)
             else:
                 m.start = 0
@@ -292,8 +289,7 @@ def process_multicmds(multicmds, G):
                 if stop - start <= 0:
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' duration of the source should not be zero or less')
                 t.start = start
-                if stop > G.timewindow:
-                    t.stop = G.timewindow
+                t.stop = min(stop, G.timewindow)
                 startstop = ' start time {:g} secs, finish time {:g} secs '.format(t.start, t.stop)
             else:
                 t.start = 0
@@ -686,8 +682,6 @@ def process_multicmds(multicmds, G):
     # Complex frequency shifted (CFS) PML parameter
     cmdname = '#pml_cfs'
     if multicmds[cmdname] != 'None':
-        if len(multicmds[cmdname]) > 2:
-            raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' can only be used up to two times, for up to a 2nd order PML')
         for cmdinstance in multicmds[cmdname]:
             tmp = cmdinstance.split()
             if len(tmp) != 12:
@@ -20,7 +20,9 @@ import h5py
 import numpy as np
 
 from gprMax.constants import floattype
+from gprMax.fields_outputs import store_outputs
 from gprMax.grid import Ix, Iy, Iz
+from gprMax.receivers import Rx
 
 
 def prepare_output_file(outputfile, G):
@@ -155,3 +157,90 @@ def write_output(f, timestep, Ex, Ey, Ez, Hx, Hy, Hz, G):
                 f['/rxs/rx' + str(rxindex + 1) + '/Hy'][timestep] = Hy[:, rxindex]
                 f['/rxs/rx' + str(rxindex + 1) + '/Hz'][timestep] = Hz[:, rxindex]
 
+
+class OutputBuffer:
+    """Stores receiver and transmission line outputs in memory during the main loop and writes them to the output file in bulk."""
+    
+    # Maximum size (bytes) of buffer before it must be written to file
+    maxbuffersize = 256 * 1024**2
+
+    def __init__(self, f, G, flushsteps=None):
+        """
+        Args:
+            f (file object): File object for the output file (prepared by prepare_output_file).
+            G (class): Grid class instance - holds essential parameters describing the model.
+            flushsteps (int): Number of iterations to store before writing to file. Default is all iterations, limited by maxbuffersize.
+        """
+
+        self.f = f
+        
+        # Receivers are stored in order of their x coordinate so those in a range of x can be stored separately
+        rxs = sorted(range(len(G.rxs)), key=lambda rxindex: G.rxs[rxindex].positionx)
+
+        # Receiver positions, and mask of which outputs are required for each receiver
+        self.rxpositions = np.array([(G.rxs[rxindex].positionx, G.rxs[rxindex].positiony, G.rxs[rxindex].positionz) for rxindex in rxs], dtype=np.int32).reshape(len(G.rxs), 3)
+        self.rxoutputs = np.array([[output in G.rxs[rxindex].outputs for output in Rx.availableoutputs] for rxindex in rxs], dtype=np.uint8).reshape(len(G.rxs), len(Rx.availableoutputs))
+        # HDF5 datasets to write to for each receiver and output
+        self.rxdatasets = [[(output, f['/rxs/rx' + str(rxindex + 1) + '/' + Rx.availableoutputs[output]]) for output in np.nonzero(self.rxoutputs[n, :])[0]] for n, rxindex in enumerate(rxs)]
+        self.tldatasets = [(f['/tls/tl' + str(tlindex + 1) + '/Vtotal'], f['/tls/tl' + str(tlindex + 1) + '/Itotal']) for tlindex in range(len(G.transmissionlines))]
+
+        # Number of iterations that can be stored
+        stepsize = np.dtype(floattype).itemsize * (len(G.rxs) * len(Rx.availableoutputs) + 2 * len(G.transmissionlines))
+        if flushsteps is None:
+            flushsteps = G.iterations
+        self.nsteps = max(1, min(flushsteps, G.iterations, self.maxbuffersize // max(stepsize, 1)))
+        
+        self.rxdata = np.zeros((len(G.rxs), len(Rx.availableoutputs), self.nsteps), dtype=floattype)
+        self.tldata = np.zeros((len(G.transmissionlines), 2, self.nsteps), dtype=floattype)
+        
+        # Iteration number corresponding to the start of the buffer, and number of iterations currently stored
+        self.start = 0
+        self.nstored = 0
+
+    def store_outputs(self, timestep, Ex, Ey, Ez, Hx, Hy, Hz, G, xs=0, xf=None):
+        """Stores field component values for receivers and transmission lines at the current timestep.
+            
+        Args:
+            timestep (int): Current iteration number.
+            Ex, Ey, Ez, Hx, Hy, Hz (memory view): Current electric and magnetic field values.
+            G (class): Grid class instance - holds essential parameters describing the model.
+            xs, xf (int): Range of x coordinates of receivers and transmission lines to store. Default is all.
+        """
+        
+        if self.nstored == 0:
+            self.start = timestep
+        step = timestep - self.start
+        if step >= self.nsteps:
+            self.flush()
+            self.start = timestep
+            step = 0
+        
+        if xf is None:
+            rxs = slice(None)
+        else:
+            rxs = slice(*np.searchsorted(self.rxpositions[:, 0], (xs, xf)))
+        store_outputs(step, G.nthreads, G.dx, G.dy, G.dz, self.rxpositions[rxs], self.rxoutputs[rxs], self.rxdata[rxs], Ex, Ey, Ez, Hx, Hy, Hz)
+
+        for tlindex, tl in enumerate(G.transmissionlines):
+            if xf is None or xs <= tl.positionx < xf:
+                self.tldata[tlindex, 0, step] = tl.voltage[tl.antpos - 1]
+                self.tldata[tlindex, 1, step] = tl.current[tl.antpos - 1]
+        
+        self.nstored = max(self.nstored, step + 1)
+
+    def flush(self):
+        """Writes any stored outputs to the output file and empties the buffer."""
+
+        if self.nstored == 0:
+            return
+        
+        timesteps = slice(self.start, self.start + self.nstored)
+        for n, datasets in enumerate(self.rxdatasets):
+            for output, dataset in datasets:
+                dataset[timesteps] = self.rxdata[n, output, 0:self.nstored]
+        for tlindex, (Vtotal, Itotal) in enumerate(self.tldatasets):
+            Vtotal[timesteps] = self.tldata[tlindex, 0, 0:self.nstored]
+            Itotal[timesteps] = self.tldata[tlindex, 1, 0:self.nstored]
+        
+        self.start += self.nstored
+        self.nstored = 0
@@ -161,28 +161,35 @@ class PML:
         self.CFS = cfs
         if not self.CFS:
             self.CFS = [CFS()]
+        # Stretching direction (0, 1, 2 for x, y, z), and whether the PML is at the start of it
+        self.axis = 'xyz'.index(self.direction[0])
+        self.reverse = self.direction.endswith('minus')
         
         # Subscript notation, e.g. 'EPhiyxz' means the electric field Phi vector, of which the
         # component being corrected is y, the stretching direction is x, and field derivative
         # is z direction.
+        # The Phi arrays are only updated for the cells of the PML, so they are all the same
+        # size and are stored as views into one (compact) buffer. The corner and edge regions
+        # where PMLs overlap are not shared, as each PML corrects for a different stretching direction.
+        # The field components corrected by the PML are listed (for the update functions) as: index of
+        # the component in the ID array, component being corrected, component being differentiated,
+        # Phi array, and sign of the correction.
+        self.Phi = np.zeros((4, len(self.CFS), self.nx, self.ny, self.nz), dtype=floattype)
         if self.direction == 'xminus' or self.direction == 'xplus':
             self.thickness = self.nx
-            self.EPhiyxz = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=floattype)
-            self.EPhizxy = np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=floattype)
-            self.HPhiyxz = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=floattype)
-            self.HPhizxy = np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=floattype)
+            self.EPhiyxz, self.EPhizxy, self.HPhiyxz, self.HPhizxy = self.Phi
+            self.Eupdates = [(1, 'Ey', 'Hz', self.EPhiyxz, -1), (2, 'Ez', 'Hy', self.EPhizxy, 1)]
+            self.Hupdates = [(4, 'Hy', 'Ez', self.HPhiyxz, 1), (5, 'Hz', 'Ey', self.HPhizxy, -1)]
         elif self.direction == 'yminus' or self.direction == 'yplus':
             self.thickness = self.ny
-            self.EPhixyz = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=floattype)
-            self.EPhizyx = np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=floattype)
-            self.HPhixyz = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=floattype)
-            self.HPhizyx = np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=floattype)
+            self.EPhixyz, self.EPhizyx, self.HPhixyz, self.HPhizyx = self.Phi
+            self.Eupdates = [(0, 'Ex', 'Hz', self.EPhixyz, 1), (2, 'Ez', 'Hx', self.EPhizyx, -1)]
+            self.Hupdates = [(3, 'Hx', 'Ez', self.HPhixyz, -1), (5, 'Hz', 'Ex', self.HPhizyx, 1)]
         elif self.direction == 'zminus' or self.direction == 'zplus':
             self.thickness = self.nz
-            self.EPhixzy = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=floattype)
-            self.EPhiyzx = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=floattype)
-            self.HPhixzy = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=floattype)
-            self.HPhiyzx = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=floattype)
+            self.EPhixzy, self.EPhiyzx, self.HPhixzy, self.HPhiyzx = self.Phi
+            self.Eupdates = [(0, 'Ex', 'Hy', self.EPhixzy, -1), (1, 'Ey', 'Hx', self.EPhiyzx, 1)]
+            self.Hupdates = [(3, 'Hx', 'Ey', self.HPhixzy, 1), (4, 'Hy', 'Ex', self.HPhiyzx, -1)]
 
         self.ERA = np.zeros((len(self.CFS), self.thickness + 1), dtype=floattype)
         self.ERB = np.zeros((len(self.CFS), self.thickness + 1), dtype=floattype)
@@ -193,6 +200,15 @@ class PML:
         self.HRE = np.zeros((len(self.CFS), self.thickness + 1), dtype=floattype)
         self.HRF = np.zeros((len(self.CFS), self.thickness + 1), dtype=floattype)
                 
+    def memory_usage(self):
+        """Calculates the memory used by the arrays of the PML.
+
+        Returns:
+            (int): Memory (bytes) used by the Phi and coefficient arrays.
+        """
+
+        return self.Phi.nbytes + sum(getattr(self, attr).nbytes for attr in ('ERA', 'ERB', 'ERE', 'ERF', 'HRA', 'HRB', 'HRE', 'HRF'))
+
     def calculate_update_coeffs(self, er, mr, G):
         """Calculates electric and magnetic update coefficients for the PML.
             
@@ -288,72 +304,23 @@ def calculate_initial_pml_params(G):
         (based on underlying material er and mr from solid array).
     """
     
+    # Relative permittivity and permeability of the materials, looked up for the cells on the face of the grid under each PML
+    er = G.material_property_array('er')
+    mr = G.material_property_array('mr')
+    
     for pml in G.pmls:
-        sumer = 0
-        summr = 0
         if pml.direction == 'xminus':
-            for j in range(G.ny):
-                for k in range(G.nz):
-                    numID = G.solid[0, j, k]
-                    material = next(x for x in G.materials if x.numID == numID)
-                    sumer += material.er
-                    summr += material.mr
-            averageer = sumer / (G.ny * G.nz)
-            averagemr = summr / (G.ny * G.nz)
+            numIDs = G.solid[0, 0:G.ny, 0:G.nz]
         elif pml.direction == 'xplus':
-            for j in range(G.ny):
-                for k in range(G.nz):
-                    numID = G.solid[G.nx - pml.thickness, j, k]
-                    material = next(x for x in G.materials if x.numID == numID)
-                    sumer += material.er
-                    summr += material.mr
-            averageer = sumer / (G.ny * G.nz)
-            averagemr = summr / (G.ny * G.nz)
+            numIDs = G.solid[G.nx - pml.thickness, 0:G.ny, 0:G.nz]
         elif pml.direction == 'yminus':
-            for i in range(G.nx):
-                for k in range(G.nz):
-                    numID = G.solid[i, 0, k]
-                    material = next(x for x in G.materials if x.numID == numID)
-                    sumer += material.er
-                    summr += material.mr
-            averageer = sumer / (G.nx * G.nz)
-            averagemr = summr / (G.nx * G.nz)
+            numIDs = G.solid[0:G.nx, 0, 0:G.nz]
         elif pml.direction == 'yplus':
-            for i in range(G.nx):
-                for k in range(G.nz):
-                    numID = G.solid[i, G.ny - pml.thickness, k]
-                    material = next(x for x in G.materials if x.numID == numID)
-                    sumer += material.er
-                    summr += material.mr
-            averageer = sumer / (G.nx * G.nz)
-            averagemr = summr / (G.nx * G.nz)
+            numIDs = G.solid[0:G.nx, G.ny - pml.thickness, 0:G.nz]
         elif pml.direction == 'zminus':
-            for i in range(G.nx):
-                for j in range(G.ny):
-                    numID = G.solid[i, j, 0]
-                    material = next(x for x in G.materials if x.numID == numID)
-                    sumer += material.er
-                    summr += material.mr
-            averageer = sumer / (G.nx * G.ny)
-            averagemr = summr / (G.nx * G.ny)
+            numIDs = G.solid[0:G.nx, 0:G.ny, 0]
         elif pml.direction == 'zplus':
-            for i in range(G.nx):
-                for j in range(G.ny):
-                    numID = G.solid[i, j, G.nz - pml.thickness]
-                    material = next(x for x in G.materials if x.numID == numID)
-                    sumer += material.er
-                    summr += material.mr
-            averageer = sumer / (G.nx * G.ny)
-            averagemr = summr / (G.nx * G.ny)
+            numIDs = G.solid[0:G.nx, 0:G.ny, G.nz - pml.thickness]
+        averageer = np.mean(er[numIDs])
+        averagemr = np.mean(mr[numIDs])
         pml.calculate_update_coeffs(averageer, averagemr, G)
-
-
-
-
-
-
-
-
-
-
-
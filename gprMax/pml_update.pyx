@@ -0,0 +1,169 @@
+# Copyright (C) 2015-2016: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+cimport numpy as np
+from cython.parallel import prange
+from gprMax.constants import floattype
+from gprMax.constants cimport floattype_t, indextype_t
+
+
+##########################################################
+# PML updates - any field component, direction and order #
+##########################################################
+cpdef update_pml(int xs, int xf, int ys, int yf, int zs, int zf, int nthreads, int component, int direction, int reverse, int sign, floattype_t[:, :] updatecoeffs, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] F, floattype_t[:, :, :] D, floattype_t[:, :, :, :] Phi, floattype_t[:, :] RA, floattype_t[:, :] RB, floattype_t[:, :] RE, floattype_t[:, :] RF, float d):
+    """This function updates a field component with the PML correction for a PML of any order, i.e. number of CFS terms.
+
+    Args:
+        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
+        nthreads (int): Number of threads to use
+        component (int): Field component being corrected (0-2 for Ex, Ey, Ez, 3-5 for Hx, Hy, Hz)
+        direction (int): Stretching direction (0, 1, 2 for x, y, z)
+        reverse (int): PML is at the start of the stretching direction (minus), so is updated in reverse order
+        sign (int): Sign of the correction, i.e. from the curl
+        updatecoeffs, ID, F, D (memoryviews): Access to update coeffients, ID, field component being corrected, and field component being differentiated
+        Phi, RA, RB, RE, RF (memoryviews): Access to PML coefficient arrays
+        d (float): Spatial discretisation in the stretching direction
+    """
+
+    cdef Py_ssize_t a, b, c, p, n, na, nb, nc, nA, nB, nC, listIndex
+    cdef Py_ssize_t offF, offD, offID, offPhi, FA, FB, FC, DA, DB, DC, IDA, IDB, IDC, PhiA, PhiB, PhiC, PhiP, Dd
+    cdef int npoles, magnetic, axis, A, B, C
+    cdef Py_ssize_t start[3]
+    cdef Py_ssize_t step[3]
+    cdef Py_ssize_t size[3]
+    cdef Py_ssize_t Fs[3]
+    cdef Py_ssize_t Ds[3]
+    cdef Py_ssize_t IDs[3]
+    cdef Py_ssize_t Phis[3]
+    cdef float dD, psi, phi
+    cdef double correction
+    cdef floattype_t *Fptr
+    cdef floattype_t *Dptr
+    cdef floattype_t *Phiptr
+    cdef indextype_t *IDptr
+    cdef Py_ssize_t ncoeffs
+    cdef floattype_t[:, ::1] coeffs
+    cdef floattype_t *coeffsptr
+    cdef floattype_t *R
+
+    npoles = RA.shape[0]
+    if xf <= xs or yf <= ys or zf <= zs:
+        return
+
+    # Electric field components are differentiated backwards and magnetic field components forwards in the stretching direction
+    magnetic = component > 2
+
+    # Cell coordinates of the first field component to update, and step to the next field component in each direction (reversed in the stretching direction for a PML at the start of it)
+    start[0], start[1], start[2] = xs, ys, zs
+    step[0], step[1], step[2] = 1, 1, 1
+    if reverse:
+        start[direction] = (xf, yf, zf)[direction] - magnetic
+        step[direction] = -1
+
+    # Parallelise over the largest dimension of the box, i.e. not the thickness of a PML slab, then the other two dimensions in order. The loop counters a, b, c are for the directions A, B, C
+    size[0], size[1], size[2] = xf - xs, yf - ys, zf - zs
+    if size[0] >= size[1] and size[0] >= size[2]:
+        A, B, C = 0, 1, 2
+    elif size[1] >= size[2]:
+        A, B, C = 1, 0, 2
+    else:
+        A, B, C = 2, 0, 1
+    na, nb, nc = size[A], size[B], size[C]
+
+    # Offsets (in elements) of the field components, ID and Phi values for the first cell, and their changes for each of the loop counters
+    offF = offD = offID = 0
+    for axis in range(3):
+        Fs[axis] = step[axis] * F.strides[axis] // sizeof(floattype_t)
+        Ds[axis] = step[axis] * D.strides[axis] // sizeof(floattype_t)
+        IDs[axis] = step[axis] * ID.strides[axis + 1] // sizeof(indextype_t)
+        Phis[axis] = Phi.strides[axis + 1] // sizeof(floattype_t)
+        offF += start[axis] * F.strides[axis] // sizeof(floattype_t)
+        offD += start[axis] * D.strides[axis] // sizeof(floattype_t)
+        offID += start[axis] * ID.strides[axis + 1] // sizeof(indextype_t)
+    FA, FB, FC = Fs[A], Fs[B], Fs[C]
+    DA, DB, DC = Ds[A], Ds[B], Ds[C]
+    IDA, IDB, IDC = IDs[A], IDs[B], IDs[C]
+    PhiA, PhiB, PhiC = Phis[A], Phis[B], Phis[C]
+    PhiP = Phi.strides[0] // sizeof(floattype_t)
+    nA, nB, nC = A == direction, B == direction, C == direction
+
+    # Offset of the field component being differentiated above (or at) the field component being corrected, and the step to the one below it
+    Dd = D.strides[direction] // sizeof(floattype_t)
+    offD += magnetic * Dd
+
+    Fptr = &F[0, 0, 0]
+    Dptr = &D[0, 0, 0]
+    IDptr = &ID[component, 0, 0, 0]
+    Phiptr = &Phi[0, 0, 0, 0]
+
+    # Coefficients for each cell into the PML, packed together: RA[0] * ... * RA[N-1], then for each CFS term p: RB[p] * RA[p+1] * ... * RA[N-1], RA[p], RB[p], RE[p], RF[p]
+    ncoeffs = 1 + 5 * npoles
+    coeffs = np.empty((RA.shape[1], ncoeffs), dtype=floattype)
+    for n in range(RA.shape[1]):
+        coeffs[n, 0] = RA[0, n]
+        for p in range(1, npoles):
+            coeffs[n, 0] = coeffs[n, 0] * RA[p, n]
+        for p in range(npoles):
+            coeffs[n, 1 + 5 * p] = RB[p, n]
+            for c in range(p + 1, npoles):
+                coeffs[n, 1 + 5 * p] = coeffs[n, 1 + 5 * p] * RA[c, n]
+            coeffs[n, 2 + 5 * p] = RA[p, n]
+            coeffs[n, 3 + 5 * p] = RB[p, n]
+            coeffs[n, 4 + 5 * p] = RE[p, n]
+            coeffs[n, 5 + 5 * p] = RF[p, n]
+    coeffsptr = &coeffs[0, 0]
+
+    # A single CFS term (the default PML) has its own loop as it is the most common, and the loop over the CFS terms is slower
+    if npoles == 1:
+        for a in prange(0, na, nogil=True, schedule='static', num_threads=nthreads):
+            for b in range(0, nb):
+                for c in range(0, nc):
+                    # Coefficients for the distance into the PML
+                    R = coeffsptr + (a * nA + b * nB + c * nC) * ncoeffs
+                    listIndex = IDptr[offID + a * IDA + b * IDB + c * IDC]
+                    dD = (Dptr[offD + a * DA + b * DB + c * DC] - Dptr[offD + a * DA + b * DB + c * DC - Dd]) / d
+                    offPhi = a * PhiA + b * PhiB + c * PhiC
+                    phi = Phiptr[offPhi]
+                    correction = (R[0] - 1) * dD + R[1] * phi
+                    Phiptr[offPhi] = R[4] * phi - R[5] * dD
+                    Fptr[offF + a * FA + b * FB + c * FC] = Fptr[offF + a * FA + b * FB + c * FC] + sign * updatecoeffs[listIndex, 4] * correction
+
+    else:
+        for a in prange(0, na, nogil=True, schedule='static', num_threads=nthreads):
+            for b in range(0, nb):
+                for c in range(0, nc):
+                    # Coefficients for the distance into the PML
+                    R = coeffsptr + (a * nA + b * nB + c * nC) * ncoeffs
+                    listIndex = IDptr[offID + a * IDA + b * IDB + c * IDC]
+                    dD = (Dptr[offD + a * DA + b * DB + c * DC] - Dptr[offD + a * DA + b * DB + c * DC - Dd]) / d
+                    offPhi = a * PhiA + b * PhiB + c * PhiC
+
+                    # Correction from all the CFS terms (accumulated in double precision)
+                    correction = (R[0] - 1) * dD
+                    for p in range(0, npoles):
+                        correction = correction + R[1 + 5 * p] * Phiptr[offPhi + p * PhiP]
+
+                    # Each CFS term is driven by the output of the previous one, i.e. psi
+                    psi = dD
+                    for p in range(0, npoles):
+                        phi = Phiptr[offPhi + p * PhiP]
+                        Phiptr[offPhi + p * PhiP] = R[4 + 5 * p] * phi - R[5 + 5 * p] * psi
+                        psi = R[2 + 5 * p] * psi + R[3 + 5 * p] * phi
+
+                    Fptr[offF + a * FA + b * FB + c * FC] = Fptr[offF + a * FA + b * FB + c * FC] + sign * updatecoeffs[listIndex, 4] * correction
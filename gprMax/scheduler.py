@@ -0,0 +1,287 @@
+# Copyright (C) 2015-2016: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Dynamic load-balanced task farm for model runs using MPI.
+
+The master process (rank 0) hands out model runs to worker processes as they become ready. Model runs are handed out longest first
+when a timing table from a previous task farm is available, and model runs that fail on a worker are re-queued for another attempt.
+Workers can be pinned to CPU cores or NUMA nodes, and the master collects a table of timings for every model run.
+"""
+
+import csv, glob, os, traceback
+from enum import Enum
+from time import perf_counter
+
+import psutil
+
+from gprMax.exceptions import CmdInputError
+
+
+# MPI message tags
+tags = Enum('tags', {'READY': 0, 'DONE': 1, 'EXIT': 2, 'START': 3, 'FAILED': 4})
+
+# Columns of the timing table
+timingfields = ['modelrun', 'worker', 'host', 'attempts', 'build', 'estimatedruntime', 'solve', 'total']
+
+
+def run_task_farm(run_model, args, numbermodelruns, inputfile, usernamespaces):
+    """Runs models using a task farm with MPI; each model parallelised with OpenMP. Must be called by every MPI process.
+
+    Args:
+        run_model (function): Function that runs a model, returning a dictionary of timings.
+        args (dict): Namespace with command line arguments
+        numbermodelruns (int): Total number of model runs.
+        inputfile (str): Name of the input file to open.
+        usernamespaces (list): Namespace for each model run that can be accessed by user in any Python code blocks in input file.
+    """
+
+    from mpi4py import MPI
+
+    comm = MPI.COMM_WORLD
+
+    # Workers sharing each node (collective, so called by every process)
+    nodecomm = comm.Split_type(MPI.COMM_TYPE_SHARED)
+    noderanks = nodecomm.allgather(comm.rank)
+    nodecomm.Free()
+
+    if comm.rank == 0:
+        master(comm, args, numbermodelruns)
+    else:
+        localworkers = sorted(x for x in noderanks if x != 0)
+        worker(comm, run_model, args, numbermodelruns, inputfile, usernamespaces, localworkers.index(comm.rank), len(localworkers))
+
+
+def master(comm, args, numbermodelruns):
+    """Master process - hands out model runs to workers, re-queues failed model runs, and collects timings.
+
+    Args:
+        comm (object): MPI communicator.
+        args (dict): Namespace with command line arguments
+        numbermodelruns (int): Total number of model runs.
+    """
+
+    from mpi4py import MPI
+
+    status = MPI.Status()
+    numworkers = comm.size - 1
+    print('Master: PID {} on {} using {} workers.'.format(os.getpid(), MPI.Get_processor_name(), numworkers))
+
+    # Order model runs longest first using any timings from a previous task farm (sort is stable so order is unchanged without timings)
+    previoustimings = read_timings(args.mpi_timings) if args.mpi_timings else {}
+    queue = sorted(range(1, numbermodelruns + 1), key=lambda modelrun: -previoustimings.get(modelrun, 0))
+
+    attempts = dict.fromkeys(queue, 0)
+    timings = {}
+    failed = {}
+    idle = []
+    running = {}
+    closedworkers = 0
+    while closedworkers < numworkers:
+        data = comm.recv(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=status)
+        source = status.Get_source()
+        tag = status.Get_tag()
+        if tag == tags.READY.value:
+            idle.append(source)
+        elif tag == tags.DONE.value:
+            modelrun = running.pop(source)
+            data.update(modelrun=modelrun, worker=source, attempts=attempts[modelrun])
+            timings[modelrun] = data
+            print('Worker {}: completed model {} in {:.1f} secs.'.format(source, modelrun, data['total']))
+        elif tag == tags.FAILED.value:
+            modelrun = running.pop(source)
+            print('Worker {}: failed model {} (attempt {}):\n{}'.format(source, modelrun, attempts[modelrun], data))
+            if attempts[modelrun] <= args.mpi_retries:
+                # Re-queue failed model run at the front of the queue
+                queue.insert(0, modelrun)
+            else:
+                failed[modelrun] = data
+        elif tag == tags.EXIT.value:
+            print('Worker {}: exited.'.format(source))
+            closedworkers += 1
+
+        # Hand out model runs to any idle workers
+        while queue and idle:
+            modelrun = queue.pop(0)
+            source = idle.pop(0)
+            attempts[modelrun] += 1
+            running[source] = modelrun
+            comm.send(modelrun, dest=source, tag=tags.START.value)
+            print('Master: sending model {} to worker {}.'.format(modelrun, source))
+
+        # Workers are only closed once there are no model runs left that could be re-queued
+        if not queue and not running:
+            for source in idle:
+                comm.send(None, dest=source, tag=tags.EXIT.value)
+            idle = []
+
+    print_timings(timings)
+    if args.mpi_timings:
+        write_timings(args.mpi_timings, timings)
+
+    if failed:
+        raise CmdInputError('Model run(s) {} failed after {} attempt(s)'.format(', '.join(str(x) for x in sorted(failed)), args.mpi_retries + 1))
+
+
+def worker(comm, run_model, args, numbermodelruns, inputfile, usernamespaces, localindex, numlocalworkers):
+    """Worker process - runs models it is sent by the master, and reports back timings or any error.
+
+    Args:
+        comm (object): MPI communicator.
+        run_model (function): Function that runs a model, returning a dictionary of timings.
+        args (dict): Namespace with command line arguments
+        numbermodelruns (int): Total number of model runs.
+        inputfile (str): Name of the input file to open.
+        usernamespaces (list): Namespace for each model run that can be accessed by user in any Python code blocks in input file.
+        localindex (int): Index of worker amongst the workers on the same node.
+        numlocalworkers (int): Number of workers on the same node.
+    """
+
+    from mpi4py import MPI
+
+    status = MPI.Status()
+    name = MPI.Get_processor_name()
+
+    if args.mpi_pin != 'none':
+        cpus = pin_worker(args.mpi_pin, localindex, numlocalworkers)
+        print('Worker {}: pinned to CPUs {}.'.format(comm.rank, cpus))
+
+    print('Worker {}: PID {} on {} requesting {} OpenMP threads.'.format(comm.rank, os.getpid(), name, os.environ.get('OMP_NUM_THREADS')))
+    while True:
+        comm.send(None, dest=0, tag=tags.READY.value)
+        # Receive a model number to run from the master
+        modelrun = comm.recv(source=0, tag=MPI.ANY_TAG, status=status)
+        tag = status.Get_tag()
+
+        if tag == tags.START.value:
+            # Run a model, reporting any error back to the master so the model run can be re-queued
+            tstart = perf_counter()
+            try:
+                timings = run_model(args, modelrun, numbermodelruns, inputfile, usernamespaces[modelrun - 1])
+            except Exception:
+                comm.send(traceback.format_exc(), dest=0, tag=tags.FAILED.value)
+            else:
+                timings['host'] = name
+                timings['total'] = perf_counter() - tstart
+                comm.send(timings, dest=0, tag=tags.DONE.value)
+        elif tag == tags.EXIT.value:
+            break
+
+    comm.send(None, dest=0, tag=tags.EXIT.value)
+
+
+def pin_worker(mode, localindex, numlocalworkers):
+    """Pins a worker process to a share of the CPU cores of its node, or to a NUMA node. If the number of OpenMP threads is not set it is set to the number of CPUs pinned to.
+
+    Args:
+        mode (str): 'cores' to pin to a contiguous block of CPUs, or 'numa' to pin to all the CPUs of a NUMA node (NUMA nodes are used in turn).
+        localindex (int): Index of worker amongst the workers on the same node.
+        numlocalworkers (int): Number of workers on the same node.
+
+    Returns:
+        cpus (list): CPUs the worker is pinned to.
+    """
+
+    process = psutil.Process()
+    if not hasattr(process, 'cpu_affinity'):
+        raise CmdInputError('Pinning workers to CPUs is not supported on this platform')
+    available = sorted(process.cpu_affinity())
+
+    if mode == 'numa':
+        numanodes = [x for x in (sorted(set(numa_cpus(node)) & set(available)) for node in sorted(glob.glob('/sys/devices/system/node/node[0-9]*'), key=lambda node: int(node.rsplit('node', 1)[1]))) if x]
+        if not numanodes:
+            numanodes = [available]
+        cpus = numanodes[localindex % len(numanodes)]
+    else:
+        ncpus = max(len(available) // numlocalworkers, 1)
+        start = (localindex * ncpus) % len(available)
+        cpus = available[start:start + ncpus]
+
+    process.cpu_affinity(cpus)
+    if not os.environ.get('OMP_NUM_THREADS'):
+        os.environ['OMP_NUM_THREADS'] = str(len(cpus))
+
+    return cpus
+
+
+def numa_cpus(node):
+    """Gets the CPUs of a NUMA node.
+
+    Args:
+        node (str): Path to the NUMA node in sysfs.
+
+    Returns:
+        cpus (list): CPUs of the NUMA node.
+    """
+
+    with open(os.path.join(node, 'cpulist')) as f:
+        cpulist = f.read().strip()
+
+    cpus = []
+    for item in filter(None, cpulist.split(',')):
+        first, _, last = item.partition('-')
+        cpus.extend(range(int(first), int(last or first) + 1))
+
+    return cpus
+
+
+def print_timings(timings):
+    """Prints a table of timings for the model runs.
+
+    Args:
+        timings (dict): Timings for each model run, keyed by model run number.
+    """
+
+    print('\nModel\tWorker\tHost\t\tAttempts\tBuild [s]\tEst. solve [s]\tSolve [s]\tTotal [s]')
+    print('{}'.format('-'*110))
+    for modelrun in sorted(timings):
+        t = timings[modelrun]
+        print('{}\t{}\t{:12}\t{}\t\t{}\t\t{}\t\t{}\t\t{}'.format(t['modelrun'], t['worker'], t['host'], t['attempts'], *('{:.2f}'.format(t[x]) if t.get(x) is not None else '-' for x in ('build', 'estimatedruntime', 'solve', 'total'))))
+
+
+def write_timings(filename, timings):
+    """Writes a table of timings for the model runs to a CSV file.
+
+    Args:
+        filename (str): Name of the CSV file.
+        timings (dict): Timings for each model run, keyed by model run number.
+    """
+
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=timingfields, extrasaction='ignore')
+        writer.writeheader()
+        for modelrun in sorted(timings):
+            writer.writerow(timings[modelrun])
+
+
+def read_timings(filename):
+    """Reads the total time of each model run from a CSV file of timings written by a previous task farm.
+
+    Args:
+        filename (str): Name of the CSV file.
+
+    Returns:
+        totals (dict): Total time of each model run, keyed by model run number, or empty if the file does not exist.
+    """
+
+    totals = {}
+    if os.path.isfile(filename):
+        with open(filename, newline='') as f:
+            for row in csv.DictReader(f):
+                totals[int(row['modelrun'])] = float(row['total'])
+
+    return totals
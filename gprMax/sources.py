@@ -20,9 +20,52 @@ import numpy as np
 
 from gprMax.constants import c, floattype
 from gprMax.grid import Ix, Iy, Iz
+from gprMax.sources_update import update_electric_sources, update_magnetic_sources
 from gprMax.utilities import round_value
 
 
+def half_step_times(G):
+    """Calculates the absolute times of the electric and magnetic field updates for the whole time window, accumulated in the same way as the main loop.
+        
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+        
+    Returns:
+        Etimes, Htimes (array): Absolute times of the electric and magnetic field updates for each iteration.
+    """
+    
+    times = np.full(2 * G.iterations, 0.5 * G.dt)
+    times[0] = 0
+    times = np.cumsum(times)
+    
+    return times[0::2], times[1::2]
+
+
+def waveform_values(source, times, G, delay=0):
+    """Calculates values of the waveform of a source at the times of the field updates it is applied at, for the whole time window.
+        
+    Args:
+        source (class): Source class instance, with its waveform already found.
+        times (array): Absolute times of the field updates for each iteration.
+        G (class): Grid class instance - holds essential parameters describing the model.
+        delay (float): Time the waveform is delayed by in addition to the start time of the source.
+        
+    Returns:
+        active (range): Iterations the source is applied at, i.e. between its start and stop times.
+        values (array): Values of the waveform for each iteration (zero where the source is not applied).
+    """
+    
+    iterations = np.flatnonzero((times >= source.start) & (times <= source.stop))
+    values = np.zeros(len(times))
+    if len(iterations) == 0:
+        return range(0), values
+    
+    active = range(iterations[0], iterations[-1] + 1)
+    values[active.start:active.stop] = source.waveform.calculate_values(times[active.start:active.stop] - source.start - delay, G.dt)
+    
+    return active, values
+
+
 class VoltageSource:
     """The voltage source can be a hard source if it's resistance is zero, i.e. the time variation of the specified electric field component is prescribed. If it's resistance is non-zero it behaves as a resistive voltage source."""
     
@@ -36,42 +79,50 @@ class VoltageSource:
         self.resistance = None
         self.waveformID = None
 
-    def update_electric(self, abstime, updatecoeffsE, ID, Ex, Ey, Ez, G):
+    def calculate_waveform_values(self, G):
+        """Finds the waveform of the source and calculates its values at the times of the electric field updates for the whole time window, so they only need to be looked up in the main loop.
+            
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+        
+        self.waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
+        self.active, self.waveformvalues = waveform_values(self, half_step_times(G)[0], G)
+
+    def update_electric(self, iteration, updatecoeffsE, ID, Ex, Ey, Ez, G):
         """Updates electric field values for a voltage source.
             
         Args:
-            abstime (float): Absolute time.
+            iteration (int): Iteration number.
             updatecoeffsE (memory view): numpy array of electric field update coefficients.
             ID (memory view): numpy array of numeric IDs corresponding to materials in the model.
             Ex, Ey, Ez (memory view): numpy array of electric field values.
             G (class): Grid class instance - holds essential parameters describing the model.
         """
             
-        if abstime >= self.start and abstime <= self.stop:
-            # Set the time of the waveform evaluation to account for any delay in the start
-            time = abstime - self.start
+        if iteration in self.active:
             i = self.positionx
             j = self.positiony
             k = self.positionz
-            waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
+            waveform = self.waveformvalues[iteration]
             
-            if self.polarisation is 'x':
+            if self.polarisation == 'x':
                 if self.resistance != 0:
-                    Ex[i, j, k] -= updatecoeffsE[ID[0, i, j, k], 4] * waveform.amp * waveform.calculate_value(time, G.dt) * (1 / (self.resistance * G.dy * G.dz))
+                    Ex[i, j, k] -= updatecoeffsE[ID[0, i, j, k], 4] * self.waveform.amp * waveform * (1 / (self.resistance * G.dy * G.dz))
                 else:
-                    Ex[i, j, k] = -1 * waveform.amp * waveform.calculate_value(time, G.dt) / G.dx
+                    Ex[i, j, k] = -1 * self.waveform.amp * waveform / G.dx
 
-            elif self.polarisation is 'y':
+            elif self.polarisation == 'y':
                 if self.resistance != 0:
-                    Ey[i, j, k] -= updatecoeffsE[ID[1, i, j, k], 4] * waveform.amp * waveform.calculate_value(time, G.dt) * (1 / (self.resistance * G.dx * G.dz))
+                    Ey[i, j, k] -= updatecoeffsE[ID[1, i, j, k], 4] * self.waveform.amp * waveform * (1 / (self.resistance * G.dx * G.dz))
                 else:
-                    Ey[i, j, k] = -1 * waveform.amp * waveform.calculate_value(time, G.dt) / G.dy
+                    Ey[i, j, k] = -1 * self.waveform.amp * waveform / G.dy
 
-            elif self.polarisation is 'z':
+            elif self.polarisation == 'z':
                 if self.resistance != 0:
-                    Ez[i, j, k] -= updatecoeffsE[ID[2, i, j, k], 4] * waveform.amp * waveform.calculate_value(time, G.dt) * (1 / (self.resistance * G.dx * G.dy))
+                    Ez[i, j, k] -= updatecoeffsE[ID[2, i, j, k], 4] * self.waveform.amp * waveform * (1 / (self.resistance * G.dx * G.dy))
                 else:
-                    Ez[i, j, k] = -1 * waveform.amp * waveform.calculate_value(time, G.dt) / G.dz
+                    Ez[i, j, k] = -1 * self.waveform.amp * waveform / G.dz
 
 
 class HertzianDipole:
@@ -86,33 +137,41 @@ class HertzianDipole:
         self.stop = None
         self.waveformID = None
 
-    def update_electric(self, abstime, updatecoeffsE, ID, Ex, Ey, Ez, G):
+    def calculate_waveform_values(self, G):
+        """Finds the waveform of the source and calculates its values at the times of the electric field updates for the whole time window, so they only need to be looked up in the main loop.
+            
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+        
+        self.waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
+        self.active, self.waveformvalues = waveform_values(self, half_step_times(G)[0], G)
+
+    def update_electric(self, iteration, updatecoeffsE, ID, Ex, Ey, Ez, G):
         """Updates electric field values for a Hertzian dipole.
             
         Args:
-            abstime (float): Absolute time.
+            iteration (int): Iteration number.
             updatecoeffsE (memory view): numpy array of electric field update coefficients.
             ID (memory view): numpy array of numeric IDs corresponding to materials in the model.
             Ex, Ey, Ez (memory view): numpy array of electric field values.
             G (class): Grid class instance - holds essential parameters describing the model.
         """
         
-        if abstime >= self.start and abstime <= self.stop:
-            # Set the time of the waveform evaluation to account for any delay in the start
-            time = abstime - self.start
+        if iteration in self.active:
             i = self.positionx
             j = self.positiony
             k = self.positionz
-            waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
+            waveform = self.waveformvalues[iteration]
             
-            if self.polarisation is 'x':
-                Ex[i, j, k] -= updatecoeffsE[ID[0, i, j, k], 4] * waveform.amp * waveform.calculate_value(time, G.dt) * (1 / (G.dy * G.dz))
+            if self.polarisation == 'x':
+                Ex[i, j, k] -= updatecoeffsE[ID[0, i, j, k], 4] * self.waveform.amp * waveform * (1 / (G.dy * G.dz))
 
-            elif self.polarisation is 'y':
-                Ey[i, j, k] -= updatecoeffsE[ID[1, i, j, k], 4] * waveform.amp * waveform.calculate_value(time, G.dt) * (1 / (G.dx * G.dz))
+            elif self.polarisation == 'y':
+                Ey[i, j, k] -= updatecoeffsE[ID[1, i, j, k], 4] * self.waveform.amp * waveform * (1 / (G.dx * G.dz))
 
-            elif self.polarisation is 'z':
-                Ez[i, j, k] -= updatecoeffsE[ID[2, i, j, k], 4] * waveform.amp * waveform.calculate_value(time, G.dt) * (1 / (G.dx * G.dy))
+            elif self.polarisation == 'z':
+                Ez[i, j, k] -= updatecoeffsE[ID[2, i, j, k], 4] * self.waveform.amp * waveform * (1 / (G.dx * G.dy))
 
 
 class MagneticDipole:
@@ -127,33 +186,41 @@ class MagneticDipole:
         self.stop = None
         self.waveformID = None
 
-    def update_magnetic(self, abstime, updatecoeffsH, ID, Hx, Hy, Hz, G):
+    def calculate_waveform_values(self, G):
+        """Finds the waveform of the source and calculates its values at the times of the magnetic field updates for the whole time window, so they only need to be looked up in the main loop.
+            
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+        
+        self.waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
+        self.active, self.waveformvalues = waveform_values(self, half_step_times(G)[1], G)
+
+    def update_magnetic(self, iteration, updatecoeffsH, ID, Hx, Hy, Hz, G):
         """Updates magnetic field values for a magnetic dipole.
             
         Args:
-            abstime (float): Absolute time.
+            iteration (int): Iteration number.
             updatecoeffsH (memory view): numpy array of magnetic field update coefficients.
             ID (memory view): numpy array of numeric IDs corresponding to materials in the model.
             Hx, Hy, Hz (memory view): numpy array of magnetic field values.
             G (class): Grid class instance - holds essential parameters describing the model.
         """
         
-        if abstime >= self.start and abstime <= self.stop:
-            # Set the time of the waveform evaluation to account for any delay in the start
-            time = abstime - self.start
+        if iteration in self.active:
             i = self.positionx
             j = self.positiony
             k = self.positionz
-            waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
+            waveform = self.waveformvalues[iteration]
             
-            if self.polarisation is 'x':
-                Hx[i, j, k] -= waveform.amp  * waveform.calculate_value(time, G.dt) * (G.dt / (G.dx * G.dy * G.dz))
+            if self.polarisation == 'x':
+                Hx[i, j, k] -= self.waveform.amp * waveform * (G.dt / (G.dx * G.dy * G.dz))
 
-            elif self.polarisation is 'y':
-                Hy[i, j, k] -= waveform.amp  * waveform.calculate_value(time, G.dt) * (G.dt / (G.dx * G.dy * G.dz))
+            elif self.polarisation == 'y':
+                Hy[i, j, k] -= self.waveform.amp * waveform * (G.dt / (G.dx * G.dy * G.dz))
 
-            elif self.polarisation is 'z':
-                Hz[i, j, k] -= waveform.amp  * waveform.calculate_value(time, G.dt) * (G.dt / (G.dx * G.dy * G.dz))
+            elif self.polarisation == 'z':
+                Hz[i, j, k] -= self.waveform.amp * waveform * (G.dt / (G.dx * G.dy * G.dz))
 
 
 class TransmissionLine:
@@ -202,18 +269,33 @@ class TransmissionLine:
             G (class): Grid class instance - holds essential parameters describing the model.
         """
         
-        abstime = 0
+        self.waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
+        
+        # Values of the waveform for the voltage and current updates (the waveform is evaluated half a time step behind each update)
+        Etimes, Htimes = half_step_times(G)
+        Evalues = self.waveform.calculate_values(Etimes[:self.nl] - 0.5 * G.dt, G.dt)
+        Hvalues = self.waveform.calculate_values(Htimes[:self.nl] - 0.5 * G.dt, G.dt)
+        
         for timestep in range(self.nl):
             self.Vinc[timestep] = self.voltage[self.antpos - 1]
             self.Iinc[timestep] = self.current[self.antpos - 1]
-            self.update_voltage(abstime, G)
-            abstime += 0.5 * G.dt
-            self.update_current(abstime, G)
-            abstime += 0.5 * G.dt
+            self.update_voltage(Evalues[timestep], G)
+            self.update_current(Hvalues[timestep], G)
 
         # Shorten number of nodes in the transmission line before use with main grid
         self.nl = self.antpos
     
+    def calculate_waveform_values(self, G):
+        """Calculates values of the waveform of the transmission line at the times of the electric (voltage) and magnetic (current) field updates for the whole time window, so they only need to be looked up in the main loop.
+            
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+        
+        Etimes, Htimes = half_step_times(G)
+        self.activeE, self.waveformvaluesE = waveform_values(self, Etimes, G, 0.5 * G.dt)
+        self.activeH, self.waveformvaluesH = waveform_values(self, Htimes, G, 0.5 * G.dt)
+
     def update_abc(self, G):
         """Updates absorbing boundary condition at end of the transmission line.
             
@@ -227,11 +309,11 @@ class TransmissionLine:
         self.abcv0 = self.voltage[0]
         self.abcv1 = self.voltage[1]
 
-    def update_voltage(self, time, G):
+    def update_voltage(self, waveform, G):
         """Updates voltage values along the transmission line.
             
         Args:
-            time (float): Absolute time.
+            waveform (float): Value of the waveform half a time step before the update.
             G (class): Grid class instance - holds essential parameters describing the model.
         """
         
@@ -239,17 +321,16 @@ class TransmissionLine:
         self.voltage[1:self.nl] -= self.resistance * (c * G.dt / self.dl) * (self.current[1:self.nl] - self.current[0:self.nl - 1])
     
         # Update the voltage at the position of the one-way injector excitation
-        waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
-        self.voltage[self.srcpos] += (c * G.dt / self.dl) * waveform.amp * waveform.calculate_value(time - 0.5 * G.dt, G.dt)
+        self.voltage[self.srcpos] += (c * G.dt / self.dl) * self.waveform.amp * waveform
 
         # Update ABC before updating current
         self.update_abc(G)
 
-    def update_current(self, time, G):
+    def update_current(self, waveform, G):
         """Updates current values along the transmission line.
             
         Args:
-            time (float): Absolute time.
+            waveform (float): Value of the waveform half a time step before the update.
             G (class): Grid class instance - holds essential parameters describing the model.
         """
         
@@ -257,60 +338,119 @@ class TransmissionLine:
         self.current[0:self.nl - 1] -= (1 / self.resistance) * (c * G.dt / self.dl) * (self.voltage[1:self.nl] - self.voltage[0:self.nl - 1])
 
         # Update the current one node before the position of the one-way injector excitation
-        waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
-        self.current[self.srcpos - 1] += (c * G.dt / self.dl) * waveform.amp * waveform.calculate_value(time - 0.5 * G.dt, G.dt) * (1 / self.resistance)
+        self.current[self.srcpos - 1] += (c * G.dt / self.dl) * self.waveform.amp * waveform * (1 / self.resistance)
 
-    def update_electric(self, abstime, Ex, Ey, Ez, G):
+    def update_electric(self, iteration, Ex, Ey, Ez, G):
         """Updates electric field value in the main grid from voltage value in the transmission line.
             
         Args:
-            abstime (float): Absolute time.
+            iteration (int): Iteration number.
             Ex, Ey, Ez (memory view): numpy array of electric field values.
             G (class): Grid class instance - holds essential parameters describing the model.
         """
         
-        if abstime >= self.start and abstime <= self.stop:
-            # Set the time of the waveform evaluation to account for any delay in the start
-            time = abstime - self.start
+        if iteration in self.activeE:
             i = self.positionx
             j = self.positiony
             k = self.positionz
             
-            self.update_voltage(time, G)
+            self.update_voltage(self.waveformvaluesE[iteration], G)
             
-            if self.polarisation is 'x':
+            if self.polarisation == 'x':
                 Ex[i, j, k] = - self.voltage[self.nl - 1] / G.dx
 
-            elif self.polarisation is 'y':
+            elif self.polarisation == 'y':
                 Ey[i, j, k] = - self.voltage[self.nl - 1] / G.dy
 
-            elif self.polarisation is 'z':
+            elif self.polarisation == 'z':
                 Ez[i, j, k] = - self.voltage[self.nl - 1] / G.dz
 
-    def update_magnetic(self, abstime, Hx, Hy, Hz, G):
+    def update_magnetic(self, iteration, Hx, Hy, Hz, G):
         """Updates current value in transmission line from magnetic field values in the main grid.
             
         Args:
-            abstime (float): Absolute time.
+            iteration (int): Iteration number.
             Hx, Hy, Hz (memory view): numpy array of magnetic field values.
             G (class): Grid class instance - holds essential parameters describing the model.
         """
         
-        if abstime >= self.start and abstime <= self.stop:
-            # Set the time of the waveform evaluation to account for any delay in the start
-            time = abstime - self.start
+        if iteration in self.activeH:
             i = self.positionx
             j = self.positiony
             k = self.positionz
             
-            if self.polarisation is 'x':
+            if self.polarisation == 'x':
                 self.current[self.nl - 1] = Ix(i, j, k, G.Hy, G.Hz, G)
 
-            elif self.polarisation is 'y':
+            elif self.polarisation == 'y':
                 self.current[self.nl - 1] = Iy(i, j, k, G.Hx, G.Hz, G)
 
-            elif self.polarisation is 'z':
+            elif self.polarisation == 'z':
                 self.current[self.nl - 1] = Iz(i, j, k, G.Hx, G.Hy, G)
 
-            self.update_current(time, G)
+            self.update_current(self.waveformvaluesH[iteration], G)
 
+
+class PackedSources:
+    """Voltage sources, Hertzian dipoles, or magnetic dipoles packed into arrays, so they are all applied with a single call in the main loop."""
+    
+    def __init__(self, sources, G):
+        """
+        Args:
+            sources (list): Source class instances, all of the same type (except transmission lines).
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+        
+        n = len(sources)
+        self.positions = np.array([(source.positionx, source.positiony, source.positionz) for source in sources], dtype=np.int32).reshape(n, 3)
+        self.components = np.array(['xyz'.index(source.polarisation) for source in sources], dtype=np.int32)
+        self.hard = np.zeros(n, dtype=np.uint8)
+        self.active = np.array([(source.active.start, source.active.stop) for source in sources], dtype=np.int32).reshape(n, 2)
+        self.amps = np.array([source.waveform.amp for source in sources], dtype=np.float64)
+        self.scales = np.zeros(n, dtype=np.float64)
+        self.waveformvalues = np.zeros((n, G.iterations), dtype=np.float64)
+        
+        # Scaling of each source (calculated in the same way as the update methods of the source classes)
+        for index, source in enumerate(sources):
+            self.waveformvalues[index, :] = source.waveformvalues
+            # Spatial discretisation in the direction of the source, and in the other two directions
+            d = (G.dx, G.dy, G.dz)[self.components[index]]
+            d1, d2 = [x for axis, x in enumerate((G.dx, G.dy, G.dz)) if axis != self.components[index]]
+            if isinstance(source, MagneticDipole):
+                self.scales[index] = G.dt / (G.dx * G.dy * G.dz)
+            elif isinstance(source, VoltageSource) and source.resistance == 0:
+                self.hard[index] = 1
+                self.scales[index] = d
+            elif isinstance(source, VoltageSource):
+                self.scales[index] = 1 / (source.resistance * d1 * d2)
+            else:
+                self.scales[index] = 1 / (d1 * d2)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def update_electric(self, iteration, G, xs=0, xf=None):
+        """Updates electric field values for all the sources.
+            
+        Args:
+            iteration (int): Iteration number.
+            G (class): Grid class instance - holds essential parameters describing the model.
+            xs, xf (int): Range of x coordinates of sources to update. Default is all.
+        """
+        
+        if xf is None:
+            xf = G.nx + 1
+        update_electric_sources(iteration, xs, xf, self.positions, self.components, self.hard, self.active, self.amps, self.scales, self.waveformvalues, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez)
+
+    def update_magnetic(self, iteration, G, xs=0, xf=None):
+        """Updates magnetic field values for all the sources.
+            
+        Args:
+            iteration (int): Iteration number.
+            G (class): Grid class instance - holds essential parameters describing the model.
+            xs, xf (int): Range of x coordinates of sources to update. Default is all.
+        """
+        
+        if xf is None:
+            xf = G.nx + 1
+        update_magnetic_sources(iteration, xs, xf, self.positions, self.components, self.active, self.amps, self.scales, self.waveformvalues, G.Hx, G.Hy, G.Hz)
@@ -0,0 +1,106 @@
+# Copyright (C) 2015-2016: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+cimport numpy as np
+cimport cython
+from gprMax.constants cimport floattype_t, indextype_t
+
+
+# Sources are applied serially, in the order they were packed, as several sources can be at the same position.
+# The arithmetic (and its precision) is the same as the update methods of the source classes.
+
+@cython.cdivision(True)
+cpdef update_electric_sources(int iteration, int xs, int xf, int[:, ::1] positions, int[::1] components, np.uint8_t[::1] hard, int[:, ::1] active, double[::1] amps, double[::1] scales, double[:, ::1] waveformvalues, floattype_t[:, :] updatecoeffsE, indextype_t[:, :, :, :] ID, floattype_t[:, :, :] Ex, floattype_t[:, :, :] Ey, floattype_t[:, :, :] Ez):
+    """This function updates electric field components from voltage sources or Hertzian dipoles.
+
+    Args:
+        iteration (int): Iteration number
+        xs, xf (int): Range of x coordinates of sources to update
+        positions (memoryview): Access to source positions (sources x 3)
+        components (memoryview): Access to field component of each source (0, 1, 2 for x, y, z)
+        hard (memoryview): Access to whether each source is a hard source, i.e. prescribes the field component
+        active (memoryview): Access to range of iterations each source is applied at (sources x 2)
+        amps (memoryview): Access to amplitude of the waveform of each source
+        scales (memoryview): Access to scaling of each source, i.e. spatial discretisation in the direction of the source for hard sources
+        waveformvalues (memoryview): Access to values of the waveform of each source (sources x iterations)
+        updatecoeffs, ID, E (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t n
+    cdef int i, j, k
+    cdef double value
+
+    with nogil:
+        for n in range(positions.shape[0]):
+            i = positions[n, 0]
+            if iteration < active[n, 0] or iteration >= active[n, 1] or i < xs or i >= xf:
+                continue
+            j = positions[n, 1]
+            k = positions[n, 2]
+            value = waveformvalues[n, iteration]
+            if components[n] == 0:
+                if hard[n]:
+                    Ex[i, j, k] = <floattype_t>((-amps[n] * value) / scales[n])
+                else:
+                    Ex[i, j, k] = <floattype_t>(Ex[i, j, k] - <floattype_t>(updatecoeffsE[ID[0, i, j, k], 4] * <floattype_t>amps[n]) * value * scales[n])
+            elif components[n] == 1:
+                if hard[n]:
+                    Ey[i, j, k] = <floattype_t>((-amps[n] * value) / scales[n])
+                else:
+                    Ey[i, j, k] = <floattype_t>(Ey[i, j, k] - <floattype_t>(updatecoeffsE[ID[1, i, j, k], 4] * <floattype_t>amps[n]) * value * scales[n])
+            else:
+                if hard[n]:
+                    Ez[i, j, k] = <floattype_t>((-amps[n] * value) / scales[n])
+                else:
+                    Ez[i, j, k] = <floattype_t>(Ez[i, j, k] - <floattype_t>(updatecoeffsE[ID[2, i, j, k], 4] * <floattype_t>amps[n]) * value * scales[n])
+
+
+cpdef update_magnetic_sources(int iteration, int xs, int xf, int[:, ::1] positions, int[::1] components, int[:, ::1] active, double[::1] amps, double[::1] scales, double[:, ::1] waveformvalues, floattype_t[:, :, :] Hx, floattype_t[:, :, :] Hy, floattype_t[:, :, :] Hz):
+    """This function updates magnetic field components from magnetic dipoles.
+
+    Args:
+        iteration (int): Iteration number
+        xs, xf (int): Range of x coordinates of sources to update
+        positions (memoryview): Access to source positions (sources x 3)
+        components (memoryview): Access to field component of each source (0, 1, 2 for x, y, z)
+        active (memoryview): Access to range of iterations each source is applied at (sources x 2)
+        amps (memoryview): Access to amplitude of the waveform of each source
+        scales (memoryview): Access to scaling of each source
+        waveformvalues (memoryview): Access to values of the waveform of each source (sources x iterations)
+        H (memoryviews): Access to field component arrays
+    """
+
+    cdef Py_ssize_t n
+    cdef int i, j, k
+    cdef double value
+
+    with nogil:
+        for n in range(positions.shape[0]):
+            i = positions[n, 0]
+            if iteration < active[n, 0] or iteration >= active[n, 1] or i < xs or i >= xf:
+                continue
+            j = positions[n, 1]
+            k = positions[n, 2]
+            value = waveformvalues[n, iteration]
+            if components[n] == 0:
+                Hx[i, j, k] = <floattype_t>(Hx[i, j, k] - amps[n] * value * scales[n])
+            elif components[n] == 1:
+                Hy[i, j, k] = <floattype_t>(Hy[i, j, k] - amps[n] * value * scales[n])
+            else:
+                Hz[i, j, k] = <floattype_t>(Hz[i, j, k] - amps[n] * value * scales[n])
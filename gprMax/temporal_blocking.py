@@ -0,0 +1,95 @@
+# Copyright (C) 2015-2016: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Temporal blocking of the main FDTD loop.
+
+A block of iterations is advanced as a wavefront that moves through the grid in the x direction. On each step of the wavefront the
+electric and then magnetic field components of a slab of x coordinates are updated for each iteration in the block, with the slab
+for each successive iteration lagging two cells behind the previous one. This satisfies the dependencies of the Yee scheme, i.e.
+E at x needs H at x and x - 1, and H at x needs E at x and x + 1, so several iterations are carried out on a few slabs of the grid
+that are resident in cache rather than streaming the whole grid from memory for every half time step.
+
+PML corrections and sources are applied to each slab after the field update in the same order as the standard loop, and receiver
+outputs are stored for each slab before its electric field update, i.e. at the start of the iteration.
+"""
+
+from gprMax.fields_update import update_electric_slab, update_magnetic_slab
+from gprMax.pml_call_updates import update_electric_pml, update_magnetic_pml
+
+
+def update_block(iteration, nsteps, abstime, width, outputs, packedsources, G):
+    """Advances the fields by a block of iterations using a wavefront in the x direction.
+
+    Args:
+        iteration (int): Iteration number at the start of the block.
+        nsteps (int): Number of iterations in the block.
+        abstime (float): Absolute time at the start of the block.
+        width (int): Number of cells in the x direction the wavefront moves on each step.
+        outputs (class): OutputBuffer class instance to store receiver outputs.
+        packedsources (tuple): PackedSources class instances for the voltage sources, Hertzian dipoles, and magnetic dipoles.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        abstime (float): Absolute time at the end of the block.
+    """
+
+    voltagesources, hertziandipoles, magneticdipoles = packedsources
+
+    # Absolute time at the end of the block (accumulated in the same way as the standard loop)
+    for step in range(nsteps):
+        abstime += 0.5 * G.dt
+        abstime += 0.5 * G.dt
+
+    # x coordinates of field components (including the last face of the grid for receivers)
+    nplanes = G.nx + 1
+
+    # Next x coordinate to be updated for the electric and magnetic field components for each iteration in the block
+    Estart = [0] * nsteps
+    Hstart = [0] * nsteps
+
+    front = 0
+    while Hstart[-1] < nplanes:
+        front += width
+        for step in range(nsteps):
+            Efinish = min(max(front - 2 * step, 0), nplanes)
+            if Efinish < nplanes:
+                Hfinish = max(Efinish - 1, 0)
+            else:
+                Hfinish = nplanes
+
+            if Efinish > Estart[step]:
+                outputs.store_outputs(iteration + step, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G, Estart[step], Efinish)
+                update_electric_slab(Estart[step], Efinish, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                update_electric_pml(G, Estart[step], Efinish)
+                voltagesources.update_electric(iteration + step, G, Estart[step], Efinish)
+                for transmissionline in G.transmissionlines:
+                    if Estart[step] <= transmissionline.positionx < Efinish:
+                        transmissionline.update_electric(iteration + step, G.Ex, G.Ey, G.Ez, G)
+                hertziandipoles.update_electric(iteration + step, G, Estart[step], Efinish)
+                Estart[step] = Efinish
+
+            if Hfinish > Hstart[step]:
+                update_magnetic_slab(Hstart[step], Hfinish, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G.Ex, G.Ey, G.Ez)
+                update_magnetic_pml(G, Hstart[step], Hfinish)
+                for transmissionline in G.transmissionlines:
+                    if Hstart[step] <= transmissionline.positionx < Hfinish:
+                        transmissionline.update_magnetic(iteration + step, G.Hx, G.Hy, G.Hz, G)
+                magneticdipoles.update_magnetic(iteration + step, G, Hstart[step], Hfinish)
+                Hstart[step] = Hfinish
+
+    return abstime
@@ -0,0 +1,56 @@
+# Copyright (C) 2015-2016: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import itertools
+from time import perf_counter
+
+from gprMax.fields_update import update_electric_tiled, update_magnetic_tiled
+
+
+# Candidate tile sizes (cells) in the y and z directions used when auto-tuning
+tilesizesj = [8, 16, 32, 64]
+tilesizesk = [32, 64, 128, 256]
+
+
+def autotune_tile_size(G, repeats=2):
+    """Finds the tile size for the tiled field update kernels that gives the shortest time for an electric and magnetic field update of the grid. Must be called before the main loop starts, i.e. when all field values are zero, as the field arrays are updated.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+        repeats (int): Number of times to time each candidate tile size.
+
+    Returns:
+        tilesize (tuple): Size of tiles in cells in the y and z directions.
+    """
+
+    candidatesj = sorted(set(min(tilej, G.ny) for tilej in tilesizesj))
+    candidatesk = sorted(set(min(tilek, G.nz) for tilek in tilesizesk))
+
+    besttime = None
+    for tilesize in itertools.product(candidatesj, candidatesk):
+        times = []
+        for repeat in range(repeats):
+            tstart = perf_counter()
+            update_electric_tiled(G.nx, G.ny, G.nz, G.nthreads, tilesize[0], tilesize[1], G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            update_magnetic_tiled(G.nx, G.ny, G.nz, G.nthreads, tilesize[0], tilesize[1], G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G.Ex, G.Ey, G.Ez)
+            times.append(perf_counter() - tstart)
+        if besttime is None or min(times) < besttime:
+            besttime = min(times)
+            besttilesize = tilesize
+
+    return besttilesize
@@ -103,4 +103,70 @@ class Waveform:
             else:
                 waveform = self.uservalues[index]
         
-        return waveform
\ No newline at end of file
+        return waveform
+    def calculate_values(self, times, dt):
+        """Calculates values of the waveform at an array of times, e.g. the times of all the field updates of a model run.
+            
+        Args:
+            times (array): Absolute times.
+            dt (float): Absolute time discretisation.
+            
+        Returns:
+            waveform (array): Calculated values for waveform.
+        """
+        
+        # Coefficients for certain waveforms
+        if self.type == 'gaussian' or self.type == 'gaussiandot' or self.type == 'gaussiandotnorm':
+            chi = 1 / self.freq
+            zeta = 2 * np.pi * np.pi * self.freq * self.freq
+            delay = times - chi
+        elif self.type == 'gaussiandotdot' or self.type == 'gaussiandotdotnorm' or self.type == 'ricker':
+            chi = np.sqrt(2) / self.freq
+            zeta = np.pi * np.pi * self.freq * self.freq
+            delay = times - chi
+    
+        # Waveforms
+        if self.type == 'gaussian':
+            waveform = np.exp(-zeta * delay * delay)
+        
+        elif self.type == 'gaussiandot':
+            waveform = -2 * zeta * delay * np.exp(-zeta * delay * delay)
+        
+        elif self.type == 'gaussiandotnorm':
+            normalise = np.sqrt(np.exp(1) / (2 * zeta))
+            waveform = -2 * zeta * delay * np.exp(-zeta * delay * delay) * normalise
+        
+        elif self.type == 'gaussiandotdot':
+            waveform = 2 * zeta * (2 * zeta * delay * delay - 1) * np.exp(-zeta * delay * delay)
+        
+        elif self.type == 'gaussiandotdotnorm':
+            normalise = 1 / (2 * zeta)
+            waveform = 2 * zeta * (2 * zeta * delay * delay - 1) * np.exp(-zeta * delay * delay) * normalise
+
+        elif self.type == 'ricker':
+            normalise = 1 / (2 * zeta)
+            waveform = - (2 * zeta * (2 * zeta * delay * delay - 1) * np.exp(-zeta * delay * delay)) * normalise
+
+        elif self.type == 'sine':
+            waveform = np.sin(2 * np.pi * self.freq * times)
+            waveform[times * self.freq > 1] = 0
+                
+        elif self.type == 'contsine':
+            rampamp = 0.25
+            ramp = np.minimum(rampamp * times * self.freq, 1)
+            waveform = ramp * np.sin(2 * np.pi * self.freq * times)
+
+        elif self.type == 'impulse':
+            # time < G.dt condition required to do impulsive magnetic dipole
+            waveform = np.where((times == 0) | (times < dt), 1.0, 0.0)
+        
+        elif self.type == 'user':
+            # Nearest index (half values are rounded towards zero, as round_value)
+            index = times / dt
+            index = np.where(index >= 0, np.ceil(index - 0.5), np.floor(index + 0.5)).astype(int)
+            # Use zero where there are no more user specified values
+            waveform = np.zeros(len(times))
+            present = index <= len(self.uservalues) - 1
+            waveform[present] = np.asarray(self.uservalues)[index[present]]
+        
+        return waveform
@@ -18,11 +18,82 @@
 
 import numpy as np
 cimport numpy as np
+from cython.parallel import prange
 from gprMax.materials import Material
 from gprMax.yee_cell_setget_rigid cimport get_rigid_Ex, get_rigid_Ey, get_rigid_Ez, get_rigid_Hx, get_rigid_Hy, get_rigid_Hz
 
 
-cpdef build_ex_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigidE, np.uint32_t[:, :, :, :] ID, G):
+cdef int averaged_material(tuple numIDs, dict averagedmaterials, list materials, G):
+    """This function finds the material averaged from a set of materials, creating it if it does not already exist.
+        
+    Args:
+        numIDs (tuple): Numeric IDs of the materials to be averaged
+        averagedmaterials (dict): Numeric IDs of existing averaged materials keyed by the sorted numeric IDs of their constituents
+        materials (list): Materials in the model
+        G (class): Grid class instance - holds essential parameters describing the model.
+        
+    Returns:
+        numID (int): Numeric ID of the averaged material
+    """
+    
+    key = tuple(sorted(numIDs))
+    if key in averagedmaterials:
+        return averagedmaterials[key]
+    
+    # Create new material with an ID composed of the names of the materials that are averaged
+    numID = len(materials)
+    m = Material(numID, '|'.join([materials[x].ID for x in numIDs]), G)
+    # Create averaged constituents for material
+    m.er = np.mean([materials[x].er for x in numIDs], axis=0)
+    m.se = np.mean([materials[x].se for x in numIDs], axis=0)
+    m.mr = np.mean([materials[x].mr for x in numIDs], axis=0)
+    m.sm = np.mean([materials[x].sm for x in numIDs], axis=0)
+    
+    # Append the new material object to the materials list
+    materials.append(m)
+    averagedmaterials[key] = numID
+    return numID
+
+
+cdef set_averaged_IDs(int component, tuple offsets, np.uint8_t[:, :, ::1] averaging, np.uint32_t[:, :, :] solid, np.uint32_t[:, :, :, :] ID, G):
+    """This function creates any averaged materials required for a field component, and sets them in the ID array. Materials are
+        created in the order they are first encountered when walking the grid, so they are numbered the same as a serial build.
+        
+    Args:
+        component (int): Index of field component in the ID array
+        offsets (tuple): Offsets (i, j, k) from a component to the cells whose materials are averaged
+        averaging (memoryview): Access to array marking the components that require averaging
+        solid, ID (memoryviews): Access to solid and ID arrays
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+    
+    cdef Py_ssize_t n
+    cdef int nthreads = G.nthreads
+    cdef np.int64_t[:] ii, jj, kk
+    cdef np.uint32_t[:] values
+    
+    i, j, k = np.nonzero(averaging)
+    if len(i) == 0:
+        return
+    
+    # Numeric IDs of the materials to be averaged for each component, and the unique combinations of them (ignoring order)
+    solidarray = np.asarray(solid)
+    numIDs = np.stack([solidarray[i + di, j + dj, k + dk] for di, dj, dk in offsets], axis=1)
+    combinations, first, inverse = np.unique(np.sort(numIDs, axis=1), axis=0, return_index=True, return_inverse=True)
+    
+    # Find or create the averaged material for each combination
+    combinationnumIDs = np.zeros(len(combinations), dtype=np.uint32)
+    for c in np.argsort(first):
+        combinationnumIDs[c] = averaged_material(tuple(numIDs[first[c]].tolist()), G.averagedmaterials, G.materials, G)
+    
+    ii = i
+    jj = j
+    kk = k
+    values = combinationnumIDs[inverse.reshape(-1)]
+    for n in prange(0, values.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        ID[component, ii[n], jj[n], kk[n]] = values[n]
+
+cpdef build_ex_component(np.uint32_t[:, :, :] solid, np.uint16_t[:, :, :] rigidE, np.uint32_t[:, :, :, :] ID, G):
     """This function builds the Ex components in the ID array.
         
     Args:
@@ -30,15 +101,19 @@ cpdef build_ex_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
     """
     
     cdef int i, j, k, numID1, numID2, numID3, numID4
+    cdef int nx = G.nx
+    cdef int ny = G.ny
+    cdef int nz = G.nz
+    cdef int nthreads = G.nthreads
+    cdef np.uint8_t[:, :, ::1] averaging = np.zeros((nx + 1, ny + 1, nz + 1), dtype=np.uint8)
 
-    for i in range(0, G.nx):
-        for j in range(1, G.ny):
-            for k in range(1, G.nz):
+    # Set components that do not require averaging, and mark those that do
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            for k in range(1, nz):
                 
                 # If rigid is True do not average
-                if get_rigid_Ex(i, j, k, rigidE):
-                    pass
-                else:
+                if not get_rigid_Ex(i, j, k, rigidE):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i, j - 1, k]
                     numID3 = solid[i, j - 1, k - 1]
@@ -48,34 +123,12 @@ cpdef build_ex_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
                     if numID1 == numID2 and numID1 == numID3 and numID1 == numID4:
                         ID[0, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        # Make an ID composed of the names of the four materials that will be averaged
-                        requiredID = G.materials[numID1].ID + '|' + G.materials[numID2].ID + '|' + G.materials[numID3].ID + '|' + G.materials[numID4].ID
-                        # Check if this material already exists
-                        tmp = requiredID.split('|')
-                        material = [x for x in G.materials if
-                                 x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-                                 x.ID.count(tmp[1]) == requiredID.count(tmp[1]) and
-                                 x.ID.count(tmp[2]) == requiredID.count(tmp[2]) and
-                                 x.ID.count(tmp[3]) == requiredID.count(tmp[3])]
-                                 
-                        if material:
-                            ID[0, i, j, k] = material[0].numID
-                        else:
-                            # Create new material
-                            newNumID = len(G.materials)
-                            m = Material(newNumID, requiredID, G)
-                            # Create averaged constituents for material
-                            m.er = np.mean((G.materials[numID1].er, G.materials[numID2].er, G.materials[numID3].er, G.materials[numID4].er), axis=0)
-                            m.se = np.mean((G.materials[numID1].se, G.materials[numID2].se, G.materials[numID3].se, G.materials[numID4].se), axis=0)
-                            m.mr = np.mean((G.materials[numID1].mr, G.materials[numID2].mr, G.materials[numID3].mr, G.materials[numID4].mr), axis=0)
-                            m.sm = np.mean((G.materials[numID1].sm, G.materials[numID2].sm, G.materials[numID3].sm, G.materials[numID4].sm), axis=0)
-                            
-                            # Append the new material object to the materials list
-                            G.materials.append(m)
-                            ID[0, i, j, k] = newNumID
+                        averaging[i, j, k] = 1
+
+    # Create any averaged materials that are required and set them in the ID array
+    set_averaged_IDs(0, ((0, 0, 0), (0, -1, 0), (0, -1, -1), (0, 0, -1)), averaging, solid, ID, G)
 
-cpdef build_ey_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigidE, np.uint32_t[:, :, :, :] ID, G):
+cpdef build_ey_component(np.uint32_t[:, :, :] solid, np.uint16_t[:, :, :] rigidE, np.uint32_t[:, :, :, :] ID, G):
     """This function builds the Ey components in the ID array.
         
     Args:
@@ -83,52 +136,34 @@ cpdef build_ey_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
     """
     
     cdef int i, j, k, numID1, numID2, numID3, numID4
+    cdef int nx = G.nx
+    cdef int ny = G.ny
+    cdef int nz = G.nz
+    cdef int nthreads = G.nthreads
+    cdef np.uint8_t[:, :, ::1] averaging = np.zeros((nx + 1, ny + 1, nz + 1), dtype=np.uint8)
 
-    for i in range(1, G.nx):
-        for j in range(0, G.ny):
-            for k in range(1, G.nz):
+    # Set components that do not require averaging, and mark those that do
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(1, nz):
                 
                 # If rigid is True do not average
-                if get_rigid_Ey(i, j, k, rigidE):
-                    pass
-                else:
+                if not get_rigid_Ey(i, j, k, rigidE):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i - 1, j, k]
                     numID3 = solid[i - 1, j, k - 1]
                     numID4 = solid[i, j, k - 1]
-
+                    
                     # If all values are the same no need to average
                     if numID1 == numID2 and numID1 == numID3 and numID1 == numID4:
                         ID[1, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        # Make an ID composed of the names of the four materials that will be averaged
-                        requiredID = G.materials[numID1].ID + '|' + G.materials[numID2].ID + '|' + G.materials[numID3].ID + '|' + G.materials[numID4].ID
-                        # Check if this material already exists
-                        tmp = requiredID.split('|')
-                        material = [x for x in G.materials if
-                                 x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-                                 x.ID.count(tmp[1]) == requiredID.count(tmp[1]) and
-                                 x.ID.count(tmp[2]) == requiredID.count(tmp[2]) and
-                                 x.ID.count(tmp[3]) == requiredID.count(tmp[3])]
-                                 
-                        if material:
-                            ID[1, i, j, k] = material[0].numID
-                        else:
-                            # Create new material
-                            newNumID = len(G.materials)
-                            m = Material(newNumID, requiredID, G)
-                            # Create averaged constituents for material
-                            m.er = np.mean((G.materials[numID1].er, G.materials[numID2].er, G.materials[numID3].er, G.materials[numID4].er), axis=0)
-                            m.se = np.mean((G.materials[numID1].se, G.materials[numID2].se, G.materials[numID3].se, G.materials[numID4].se), axis=0)
-                            m.mr = np.mean((G.materials[numID1].mr, G.materials[numID2].mr, G.materials[numID3].mr, G.materials[numID4].mr), axis=0)
-                            m.sm = np.mean((G.materials[numID1].sm, G.materials[numID2].sm, G.materials[numID3].sm, G.materials[numID4].sm), axis=0)
-                            
-                            # Append the new material object to the materials list
-                            G.materials.append(m)
-                            ID[1, i, j, k] = newNumID
+                        averaging[i, j, k] = 1
+
+    # Create any averaged materials that are required and set them in the ID array
+    set_averaged_IDs(1, ((0, 0, 0), (-1, 0, 0), (-1, 0, -1), (0, 0, -1)), averaging, solid, ID, G)
 
-cpdef build_ez_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigidE, np.uint32_t[:, :, :, :] ID, G):
+cpdef build_ez_component(np.uint32_t[:, :, :] solid, np.uint16_t[:, :, :] rigidE, np.uint32_t[:, :, :, :] ID, G):
     """This function builds the Ez components in the ID array.
         
     Args:
@@ -136,15 +171,19 @@ cpdef build_ez_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
     """
     
     cdef int i, j, k, numID1, numID2, numID3, numID4
+    cdef int nx = G.nx
+    cdef int ny = G.ny
+    cdef int nz = G.nz
+    cdef int nthreads = G.nthreads
+    cdef np.uint8_t[:, :, ::1] averaging = np.zeros((nx + 1, ny + 1, nz + 1), dtype=np.uint8)
 
-    for i in range(1, G.nx):
-        for j in range(1, G.ny):
-            for k in range(0, G.nz):
+    # Set components that do not require averaging, and mark those that do
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            for k in range(0, nz):
                 
                 # If rigid is True do not average
-                if get_rigid_Ez(i, j, k, rigidE):
-                    pass
-                else:
+                if not get_rigid_Ez(i, j, k, rigidE):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i - 1, j, k]
                     numID3 = solid[i - 1, j - 1, k]
@@ -154,34 +193,12 @@ cpdef build_ez_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
                     if numID1 == numID2 and numID1 == numID3 and numID1 == numID4:
                         ID[2, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        # Make an ID composed of the names of the four materials that will be averaged
-                        requiredID = G.materials[numID1].ID + '|' + G.materials[numID2].ID + '|' + G.materials[numID3].ID + '|' + G.materials[numID4].ID
-                        # Check if this material already exists
-                        tmp = requiredID.split('|')
-                        material = [x for x in G.materials if
-                                 x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-                                 x.ID.count(tmp[1]) == requiredID.count(tmp[1]) and
-                                 x.ID.count(tmp[2]) == requiredID.count(tmp[2]) and
-                                 x.ID.count(tmp[3]) == requiredID.count(tmp[3])]
-                                 
-                        if material:
-                            ID[2, i, j, k] = material[0].numID
-                        else:
-                            # Create new material
-                            newNumID = len(G.materials)
-                            m = Material(newNumID, requiredID, G)
-                            # Create averaged constituents for material
-                            m.er = np.mean((G.materials[numID1].er, G.materials[numID2].er, G.materials[numID3].er, G.materials[numID4].er), axis=0)
-                            m.se = np.mean((G.materials[numID1].se, G.materials[numID2].se, G.materials[numID3].se, G.materials[numID4].se), axis=0)
-                            m.mr = np.mean((G.materials[numID1].mr, G.materials[numID2].mr, G.materials[numID3].mr, G.materials[numID4].mr), axis=0)
-                            m.sm = np.mean((G.materials[numID1].sm, G.materials[numID2].sm, G.materials[numID3].sm, G.materials[numID4].sm), axis=0)
+                        averaging[i, j, k] = 1
 
-                            # Append the new material object to the materials list
-                            G.materials.append(m)
-                            ID[2, i, j, k] = newNumID
+    # Create any averaged materials that are required and set them in the ID array
+    set_averaged_IDs(2, ((0, 0, 0), (-1, 0, 0), (-1, -1, 0), (0, -1, 0)), averaging, solid, ID, G)
 
-cpdef build_hx_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigidH, np.uint32_t[:, :, :, :] ID, G):
+cpdef build_hx_component(np.uint32_t[:, :, :] solid, np.uint8_t[:, :, :] rigidH, np.uint32_t[:, :, :, :] ID, G):
     """This function builds the Hx components in the ID array.
         
     Args:
@@ -189,15 +206,19 @@ cpdef build_hx_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
     """
     
     cdef int i, j, k, numID1, numID2
+    cdef int nx = G.nx
+    cdef int ny = G.ny
+    cdef int nz = G.nz
+    cdef int nthreads = G.nthreads
+    cdef np.uint8_t[:, :, ::1] averaging = np.zeros((nx + 1, ny + 1, nz + 1), dtype=np.uint8)
 
-    for i in range(1, G.nx):
-        for j in range(0, G.ny):
-            for k in range(0, G.nz):
+    # Set components that do not require averaging, and mark those that do
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(0, nz):
                 
                 # If rigid is True do not average
-                if get_rigid_Hx(i, j, k, rigidH):
-                    pass
-                else:
+                if not get_rigid_Hx(i, j, k, rigidH):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i - 1, j, k]
                     
@@ -205,33 +226,12 @@ cpdef build_hx_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
                     if numID1 == numID2:
                         ID[3, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        # Make an ID composed of the names of the four materials that will be averaged
-                        requiredID = G.materials[numID1].ID + '|' + G.materials[numID2].ID
-                        # Check if this material already exists
-                        tmp = requiredID.split('|')
-                        material = [x for x in G.materials if
-                                    (x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-                                     x.ID.count(tmp[1]) == requiredID.count(tmp[1])) or
-                                    (x.ID.count(tmp[0]) % 2 == 0 and x.ID.count(tmp[1]) % 2 == 0)]
-                        
-                        if material:
-                            ID[3, i, j, k] = material[0].numID
-                        else:
-                            # Create new material
-                            newNumID = len(G.materials)
-                            m = Material(newNumID, requiredID, G)
-                            # Create averaged constituents for material
-                            m.er = np.mean((G.materials[numID1].er, G.materials[numID2].er), axis=0)
-                            m.se = np.mean((G.materials[numID1].se, G.materials[numID2].se), axis=0)
-                            m.mr = np.mean((G.materials[numID1].mr, G.materials[numID2].mr), axis=0)
-                            m.sm = np.mean((G.materials[numID1].sm, G.materials[numID2].sm), axis=0)
-                            
-                            # Append the new material object to the materials list
-                            G.materials.append(m)
-                            ID[3, i, j, k] = newNumID
+                        averaging[i, j, k] = 1
 
-cpdef build_hy_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigidH, np.uint32_t[:, :, :, :] ID, G):
+    # Create any averaged materials that are required and set them in the ID array
+    set_averaged_IDs(3, ((0, 0, 0), (-1, 0, 0)), averaging, solid, ID, G)
+
+cpdef build_hy_component(np.uint32_t[:, :, :] solid, np.uint8_t[:, :, :] rigidH, np.uint32_t[:, :, :, :] ID, G):
     """This function builds the Hy components in the ID array.
         
     Args:
@@ -239,15 +239,19 @@ cpdef build_hy_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
     """
     
     cdef int i, j, k, numID1, numID2
+    cdef int nx = G.nx
+    cdef int ny = G.ny
+    cdef int nz = G.nz
+    cdef int nthreads = G.nthreads
+    cdef np.uint8_t[:, :, ::1] averaging = np.zeros((nx + 1, ny + 1, nz + 1), dtype=np.uint8)
 
-    for i in range(0, G.nx):
-        for j in range(1, G.ny):
-            for k in range(0, G.nz):
+    # Set components that do not require averaging, and mark those that do
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            for k in range(0, nz):
                 
                 # If rigid is True do not average
-                if get_rigid_Hy(i, j, k, rigidH):
-                    pass
-                else:
+                if not get_rigid_Hy(i, j, k, rigidH):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i, j - 1, k]
                     
@@ -255,33 +259,12 @@ cpdef build_hy_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
                     if numID1 == numID2:
                         ID[4, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        # Make an ID composed of the names of the four materials that will be averaged
-                        requiredID = G.materials[numID1].ID + '|' + G.materials[numID2].ID
-                        # Check if this material already exists
-                        tmp = requiredID.split('|')
-                        material = [x for x in G.materials if
-                                    (x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-                                     x.ID.count(tmp[1]) == requiredID.count(tmp[1])) or
-                                    (x.ID.count(tmp[0]) % 2 == 0 and x.ID.count(tmp[1]) % 2 == 0)]
-                        
-                        if material:
-                            ID[4, i, j, k] = material[0].numID
-                        else:
-                            # Create new material
-                            newNumID = len(G.materials)
-                            m = Material(newNumID, requiredID, G)
-                            # Create averaged constituents for material
-                            m.er = np.mean((G.materials[numID1].er, G.materials[numID2].er), axis=0)
-                            m.se = np.mean((G.materials[numID1].se, G.materials[numID2].se), axis=0)
-                            m.mr = np.mean((G.materials[numID1].mr, G.materials[numID2].mr), axis=0)
-                            m.sm = np.mean((G.materials[numID1].sm, G.materials[numID2].sm), axis=0)
-                            
-                            # Append the new material object to the materials list
-                            G.materials.append(m)
-                            ID[4, i, j, k] = newNumID
+                        averaging[i, j, k] = 1
+
+    # Create any averaged materials that are required and set them in the ID array
+    set_averaged_IDs(4, ((0, 0, 0), (0, -1, 0)), averaging, solid, ID, G)
 
-cpdef build_hz_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigidH, np.uint32_t[:, :, :, :] ID, G):
+cpdef build_hz_component(np.uint32_t[:, :, :] solid, np.uint8_t[:, :, :] rigidH, np.uint32_t[:, :, :, :] ID, G):
     """This function builds the Hz components in the ID array.
         
     Args:
@@ -289,15 +272,19 @@ cpdef build_hz_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
     """
     
     cdef int i, j, k, numID1, numID2
+    cdef int nx = G.nx
+    cdef int ny = G.ny
+    cdef int nz = G.nz
+    cdef int nthreads = G.nthreads
+    cdef np.uint8_t[:, :, ::1] averaging = np.zeros((nx + 1, ny + 1, nz + 1), dtype=np.uint8)
 
-    for i in range(0, G.nx):
-        for j in range(0, G.ny):
-            for k in range(1, G.nz):
+    # Set components that do not require averaging, and mark those that do
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(1, nz):
                 
                 # If rigid is True do not average
-                if get_rigid_Hz(i, j, k, rigidH):
-                    pass
-                else:
+                if not get_rigid_Hz(i, j, k, rigidH):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i, j, k - 1]
                     
@@ -305,28 +292,7 @@ cpdef build_hz_component(np.uint32_t[:, :, :] solid, np.int8_t[:, :, :, :] rigid
                     if numID1 == numID2:
                         ID[5, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        # Make an ID composed of the names of the four materials that will be averaged
-                        requiredID = G.materials[numID1].ID + '|' + G.materials[numID2].ID
-                        # Check if this material already exists
-                        tmp = requiredID.split('|')
-                        material = [x for x in G.materials if
-                                    (x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-                                     x.ID.count(tmp[1]) == requiredID.count(tmp[1])) or
-                                    (x.ID.count(tmp[0]) % 2 == 0 and x.ID.count(tmp[1]) % 2 == 0)]
-                        
-                        if material:
-                            ID[5, i, j, k] = material[0].numID
-                        else:
-                            # Create new material
-                            newNumID = len(G.materials)
-                            m = Material(newNumID, requiredID, G)
-                            # Create averaged constituents for material
-                            m.er = np.mean((G.materials[numID1].er, G.materials[numID2].er), axis=0)
-                            m.se = np.mean((G.materials[numID1].se, G.materials[numID2].se), axis=0)
-                            m.mr = np.mean((G.materials[numID1].mr, G.materials[numID2].mr), axis=0)
-                            m.sm = np.mean((G.materials[numID1].sm, G.materials[numID2].sm), axis=0)
-                            
-                            # Append the new material object to the materials list
-                            G.materials.append(m)
-                            ID[5, i, j, k] = newNumID
+                        averaging[i, j, k] = 1
+
+    # Create any averaged materials that are required and set them in the ID array
+    set_averaged_IDs(5, ((0, 0, 0), (0, 0, -1)), averaging, solid, ID, G)
@@ -19,26 +19,26 @@
 import numpy as np
 cimport numpy as np
 
-# Get and set functions for the rigid electric component array. The rigid array is 4D with the 1st dimension holding
-# the 12 electric edge components of a cell - Ex1, Ex2, Ex3, Ex4, Ey1, Ey2, Ey3, Ey4, Ez1, Ez2, Ez3, Ez4
-cdef bint get_rigid_Ex(int i, int j, int k, np.int8_t[:, :, :, :] rigidE)
-cdef bint get_rigid_Ey(int i, int j, int k, np.int8_t[:, :, :, :] rigidE)
-cdef bint get_rigid_Ez(int i, int j, int k, np.int8_t[:, :, :, :] rigidE)
-cdef void set_rigid_Ex(int i, int j, int k, np.int8_t[:, :, :, :] rigidE)
-cdef void set_rigid_Ey(int i, int j, int k, np.int8_t[:, :, :, :] rigidE)
-cdef void set_rigid_Ez(int i, int j, int k, np.int8_t[:, :, :, :] rigidE)
-cdef void set_rigid_E(int i, int j, int k, np.int8_t[:, :, :, :] rigidE)
-cdef void unset_rigid_E(int i, int j, int k, np.int8_t[:, :, :, :] rigidE)
+# Get and set functions for the rigid electric component array. The rigid array is 3D and is bit-packed, with bits 0 to 11 of
+# each element holding the 12 electric edge components of a cell - Ex1, Ex2, Ex3, Ex4, Ey1, Ey2, Ey3, Ey4, Ez1, Ez2, Ez3, Ez4
+cdef bint get_rigid_Ex(int i, int j, int k, np.uint16_t[:, :, :] rigidE) noexcept nogil
+cdef bint get_rigid_Ey(int i, int j, int k, np.uint16_t[:, :, :] rigidE) noexcept nogil
+cdef bint get_rigid_Ez(int i, int j, int k, np.uint16_t[:, :, :] rigidE) noexcept nogil
+cdef void set_rigid_Ex(int i, int j, int k, np.uint16_t[:, :, :] rigidE)
+cdef void set_rigid_Ey(int i, int j, int k, np.uint16_t[:, :, :] rigidE)
+cdef void set_rigid_Ez(int i, int j, int k, np.uint16_t[:, :, :] rigidE)
+cdef void set_rigid_E(int i, int j, int k, np.uint16_t[:, :, :] rigidE)
+cdef void unset_rigid_E(int i, int j, int k, np.uint16_t[:, :, :] rigidE)
 
-# Get and set functions for the rigid magnetic component array. The rigid array is 4D with the 1st dimension holding
-# the 6 magnetic edge components - Hx1, Hx2, Hy1, Hy2, Hz1, Hz2
-cdef bint get_rigid_Hx(int i, int j, int k, np.int8_t[:, :, :, :] rigidH)
-cdef bint get_rigid_Hy(int i, int j, int k, np.int8_t[:, :, :, :] rigidH)
-cdef bint get_rigid_Hz(int i, int j, int k, np.int8_t[:, :, :, :] rigidH)
-cdef void set_rigid_Hx(int i, int j, int k, np.int8_t[:, :, :, :] rigidH)
-cdef void set_rigid_Hy(int i, int j, int k, np.int8_t[:, :, :, :] rigidH)
-cdef void set_rigid_Hz(int i, int j, int k, np.int8_t[:, :, :, :] rigidH)
-cdef void set_rigid_H(int i, int j, int k, np.int8_t[:, :, :, :] rigidH)
-cdef void unset_rigid_H(int i, int j, int k, np.int8_t[:, :, :, :] rigidH)
+# Get and set functions for the rigid magnetic component array. The rigid array is 3D and is bit-packed, with bits 0 to 5 of
+# each element holding the 6 magnetic edge components - Hx1, Hx2, Hy1, Hy2, Hz1, Hz2
+cdef bint get_rigid_Hx(int i, int j, int k, np.uint8_t[:, :, :] rigidH) noexcept nogil
+cdef bint get_rigid_Hy(int i, int j, int k, np.uint8_t[:, :, :] rigidH) noexcept nogil
+cdef bint get_rigid_Hz(int i, int j, int k, np.uint8_t[:, :, :] rigidH) noexcept nogil
+cdef void set_rigid_Hx(int i, int j, int k, np.uint8_t[:, :, :] rigidH)
+cdef void set_rigid_Hy(int i, int j, int k, np.uint8_t[:, :, :] rigidH)
+cdef void set_rigid_Hz(int i, int j, int k, np.uint8_t[:, :, :] rigidH)
+cdef void set_rigid_H(int i, int j, int k, np.uint8_t[:, :, :] rigidH)
+cdef void unset_rigid_H(int i, int j, int k, np.uint8_t[:, :, :] rigidH)
 
 